@@ -0,0 +1,47 @@
+"""add api key hash to users
+
+Revision ID: 3c1e7a9d2b4f
+Revises: 9690abbd48dd
+Create Date: 2026-10-15 12:00:00.000000
+
+"""
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1e7a9d2b4f'
+down_revision: Union[str, None] = '9690abbd48dd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Add api_key_hash column (nullable until existing rows are backfilled)
+    op.add_column('users', sa.Column('api_key_hash', sa.LargeBinary(16), nullable=True))
+    
+    # Backfill hashes for existing keys (BLAKE2b isn't available in Postgres)
+    conn = op.get_bind()
+    users = sa.table(
+        'users',
+        sa.column('id'),
+        sa.column('api_key', sa.String),
+        sa.column('api_key_hash', sa.LargeBinary),
+    )
+    for user_id, api_key in conn.execute(sa.select(users.c.id, users.c.api_key)):
+        conn.execute(
+            users.update()
+            .where(users.c.id == user_id)
+            .values(api_key_hash=hashlib.blake2b(api_key.encode(), digest_size=16).digest())
+        )
+    
+    op.alter_column('users', 'api_key_hash', nullable=False)
+    op.create_index('ix_users_api_key_hash', 'users', ['api_key_hash'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_api_key_hash', table_name='users')
+    op.drop_column('users', 'api_key_hash')
@@ -0,0 +1,28 @@
+"""add requests (user_id, created_at, id) index
+
+Revision ID: 5e8a1c3f7d9b
+Revises: 7b2d4f6a8c1e
+Create Date: 2026-10-15 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e8a1c3f7d9b'
+down_revision: Union[str, None] = '7b2d4f6a8c1e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Lets the request history seek to (created_at, id) instead of OFFSET scans
+    op.create_index(
+        'ix_requests_user_id_created_at_id', 'requests', ['user_id', 'created_at', 'id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_requests_user_id_created_at_id', table_name='requests')
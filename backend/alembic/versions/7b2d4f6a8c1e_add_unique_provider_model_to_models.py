@@ -0,0 +1,28 @@
+"""add unique provider/model to models
+
+Revision ID: 7b2d4f6a8c1e
+Revises: 3c1e7a9d2b4f
+Create Date: 2026-10-15 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2d4f6a8c1e'
+down_revision: Union[str, None] = '3c1e7a9d2b4f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Lets seeding upsert models with ON CONFLICT (provider_id, model_id)
+    op.create_unique_constraint(
+        'uq_models_provider_id_model_id', 'models', ['provider_id', 'model_id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_models_provider_id_model_id', 'models', type_='unique')
@@ -0,0 +1,33 @@
+"""add trigram index on requests.prompt_text
+
+Revision ID: 8d4b2e6f0a3c
+Revises: 5e8a1c3f7d9b
+Create Date: 2026-10-15 15:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4b2e6f0a3c'
+down_revision: Union[str, None] = '5e8a1c3f7d9b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Trigram GIN index lets ILIKE '%term%' searches use an index
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_requests_prompt_text_trgm',
+        'requests',
+        ['prompt_text'],
+        postgresql_using='gin',
+        postgresql_ops={'prompt_text': 'gin_trgm_ops'}
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_requests_prompt_text_trgm', table_name='requests')
@@ -0,0 +1,58 @@
+"""add usage_daily rollups
+
+Revision ID: a1f3c5e7b9d2
+Revises: 8d4b2e6f0a3c
+Create Date: 2026-10-15 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1f3c5e7b9d2'
+down_revision: Union[str, None] = '8d4b2e6f0a3c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'usage_daily',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('provider_id', sa.Integer(), sa.ForeignKey('providers.id'), nullable=False),
+        sa.Column('model_id', sa.Integer(), sa.ForeignKey('models.id'), nullable=False),
+        sa.Column('requests', sa.Integer(), nullable=False),
+        sa.Column('success_count', sa.Integer(), nullable=False),
+        sa.Column('input_tokens', sa.BigInteger(), nullable=False),
+        sa.Column('output_tokens', sa.BigInteger(), nullable=False),
+        sa.Column('cost_usd', sa.Float(), nullable=False),
+        sa.Column('latency_sum_ms', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('user_id', 'day', 'provider_id', 'model_id')
+    )
+    
+    # Backfill every settled (UTC) day, leaving yesterday open as
+    # UsageService.refresh_rollups does (ROLLUP_GRACE_DAYS); later days are
+    # rolled up by the src/utils/refresh_rollups.py job
+    op.execute("""
+        INSERT INTO usage_daily (
+            user_id, day, provider_id, model_id, requests, success_count,
+            input_tokens, output_tokens, cost_usd, latency_sum_ms
+        )
+        SELECT
+            user_id, date(created_at), provider_id, model_id, count(*),
+            sum(CASE WHEN status = 'success' THEN 1 ELSE 0 END),
+            coalesce(sum(input_tokens), 0), coalesce(sum(output_tokens), 0),
+            coalesce(sum(total_cost_usd), 0), coalesce(sum(latency_ms), 0)
+        FROM requests
+        WHERE created_at < date(now() AT TIME ZONE 'utc') - interval '1 day'
+        GROUP BY user_id, date(created_at), provider_id, model_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('usage_daily')
@@ -0,0 +1,41 @@
+"""add model and provider slugs to requests
+
+Revision ID: b2e4d6f8a0c1
+Revises: a1f3c5e7b9d2
+Create Date: 2026-10-15 16:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2e4d6f8a0c1'
+down_revision: Union[str, None] = 'a1f3c5e7b9d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('requests', sa.Column('model_slug', sa.String(100), nullable=True))
+    op.add_column('requests', sa.Column('provider_slug', sa.String(50), nullable=True))
+    
+    # One-time backfill; new rows are written with both slugs
+    op.execute("""
+        UPDATE requests
+        SET model_slug = models.model_id, provider_slug = providers.name
+        FROM models, providers
+        WHERE models.id = requests.model_id AND providers.id = requests.provider_id
+    """)
+    
+    op.alter_column('requests', 'model_slug', nullable=False)
+    op.alter_column('requests', 'provider_slug', nullable=False)
+    op.create_index('ix_requests_user_id_model_slug', 'requests', ['user_id', 'model_slug'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_requests_user_id_model_slug', table_name='requests')
+    op.drop_column('requests', 'provider_slug')
+    op.drop_column('requests', 'model_slug')
@@ -0,0 +1,37 @@
+"""add prompt_preview to requests
+
+Revision ID: c3f5a7b9d1e2
+Revises: b2e4d6f8a0c1
+Create Date: 2026-10-15 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f5a7b9d1e2'
+down_revision: Union[str, None] = 'b2e4d6f8a0c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('requests', sa.Column('prompt_preview', sa.String(53), nullable=True))
+    
+    # Same rule as src.utils.prompt_preview.make_prompt_preview
+    op.execute("""
+        UPDATE requests
+        SET prompt_preview = CASE
+            WHEN length(prompt_text) > 50 THEN left(prompt_text, 50) || '...'
+            ELSE prompt_text
+        END
+    """)
+    
+    op.alter_column('requests', 'prompt_preview', nullable=False)
+
+
+def downgrade() -> None:
+    op.drop_column('requests', 'prompt_preview')
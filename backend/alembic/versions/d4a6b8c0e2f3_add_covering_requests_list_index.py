@@ -0,0 +1,65 @@
+"""add covering requests (user_id, created_at, id) index
+
+Revision ID: d4a6b8c0e2f3
+Revises: c3f5a7b9d1e2
+Create Date: 2026-10-15 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a6b8c0e2f3'
+down_revision: Union[str, None] = 'c3f5a7b9d1e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INCLUDE_COLUMNS = [
+    'model_id',
+    'provider_id',
+    'model_slug',
+    'provider_slug',
+    'prompt_preview',
+    'status',
+    'input_tokens',
+    'output_tokens',
+    'total_cost_usd',
+    'latency_ms',
+]
+
+
+def upgrade() -> None:
+    # Built concurrently so the requests table stays writable; the plain
+    # index it replaces is only dropped once the covering one exists
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_requests_user_id_created_at_id_covering',
+            'requests',
+            ['user_id', 'created_at', 'id'],
+            postgresql_include=INCLUDE_COLUMNS,
+            postgresql_concurrently=True
+        )
+        op.drop_index(
+            'ix_requests_user_id_created_at_id',
+            table_name='requests',
+            postgresql_concurrently=True
+        )
+        # Index-only scans need an up-to-date visibility map
+        op.execute('VACUUM (ANALYZE) requests')
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_requests_user_id_created_at_id',
+            'requests',
+            ['user_id', 'created_at', 'id'],
+            postgresql_concurrently=True
+        )
+        op.drop_index(
+            'ix_requests_user_id_created_at_id_covering',
+            table_name='requests',
+            postgresql_concurrently=True
+        )
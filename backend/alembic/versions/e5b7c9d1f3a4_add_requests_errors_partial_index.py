@@ -0,0 +1,39 @@
+"""add partial requests index for errors
+
+Revision ID: e5b7c9d1f3a4
+Revises: d4a6b8c0e2f3
+Create Date: 2026-10-15 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b7c9d1f3a4'
+down_revision: Union[str, None] = 'd4a6b8c0e2f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Only error rows are indexed; serves the history's status=error filter
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_requests_user_id_created_at_errors',
+            'requests',
+            ['user_id', 'created_at'],
+            postgresql_where=sa.text("status = 'error'"),
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_requests_user_id_created_at_errors',
+            table_name='requests',
+            postgresql_concurrently=True
+        )
@@ -1,4 +1,9 @@
-"""Test budget enforcement."""
+"""Test budget enforcement.
+
+Calls the FastAPI app in-process by default; pass --live to test a
+running server on port 8001 instead.
+"""
+import asyncio
 import sys
 import os
 from pathlib import Path
@@ -7,6 +12,39 @@ sys.path.append(str(Path(__file__).parent.parent.parent))
 
 import httpx
 
+LIVE_BASE_URL = "http://127.0.0.1:8001"
+
+# Shared client for every request; set up by build_client() before the tests run
+_CLIENT: httpx.AsyncClient = None
+
+
+def build_client(live: bool) -> httpx.AsyncClient:
+    """
+    Create the client used by make_request.
+    
+    Args:
+        live: Send requests to the server at LIVE_BASE_URL instead of
+            calling the app in-process
+    
+    Returns:
+        httpx.AsyncClient with JSON headers and a 30s timeout
+    """
+    if live:
+        transport_kwargs = {"base_url": LIVE_BASE_URL}
+    else:
+        # Requests become direct ASGI calls; no sockets involved
+        from src.main import app
+        transport_kwargs = {
+            "transport": httpx.ASGITransport(app=app),
+            "base_url": "http://testserver"
+        }
+    
+    return httpx.AsyncClient(
+        headers={"Content-Type": "application/json"},
+        timeout=30.0,
+        **transport_kwargs
+    )
+
 
 def get_api_key():
     """Get API key from environment."""
@@ -17,35 +55,28 @@ def get_api_key():
     return api_key
 
 
-def make_request(method: str, endpoint: str, api_key: str, json=None, params=None):
+async def make_request(method: str, endpoint: str, api_key: str, json=None, params=None):
     """Make API request."""
-    url = f"http://127.0.0.1:8001{endpoint}"
-    headers = {
-        "Content-Type": "application/json",
-        "X-API-Key": api_key
-    }
-    
     try:
-        if method == "GET":
-            response = httpx.get(url, headers=headers, params=params, timeout=30.0)
-        elif method == "POST":
-            response = httpx.post(url, json=json, headers=headers, timeout=30.0)
-        elif method == "PUT":
-            response = httpx.put(url, json=json, headers=headers, params=params, timeout=30.0)
-        
-        return response
+        return await _CLIENT.request(
+            method,
+            endpoint,
+            headers={"X-API-Key": api_key},
+            json=json,
+            params=params
+        )
     except httpx.HTTPError as e:
         print(f"❌ Request failed: {e}")
         sys.exit(1)
 
 
-def test_check_current_budget(api_key: str):
+async def test_check_current_budget(api_key: str):
     """Check current budget status."""
     print("=" * 60)
     print("Test 1: Check Current Budget")
     print("=" * 60)
     
-    response = make_request("GET", "/v1/budget", api_key)
+    response = await make_request("GET", "/v1/budget", api_key)
     data = response.json()
     
     print(f"✓ Total spent: ${data['spending']['total_spent_usd']:.6f}")
@@ -59,14 +90,14 @@ def test_check_current_budget(api_key: str):
     return data['spending']
 
 
-def test_set_low_budget(api_key: str):
+async def test_set_low_budget(api_key: str):
     """Set a very low budget limit."""
     print("=" * 60)
     print("Test 2: Set Low Budget Limit")
     print("=" * 60)
     print("Setting limit to $0.000001...\n")
     
-    response = make_request("PUT", "/v1/budget/limit", api_key, params={"limit_usd": 0.000001})
+    response = await make_request("PUT", "/v1/budget/limit", api_key, params={"limit_usd": 0.000001})
     data = response.json()
     
     print(f"✓ {data['message']}")
@@ -74,7 +105,7 @@ def test_set_low_budget(api_key: str):
     print()
 
 
-def test_request_exceeds_budget(api_key: str):
+async def test_request_exceeds_budget(api_key: str):
     """Try request that exceeds budget."""
     print("=" * 60)
     print("Test 3: Request Exceeding Budget")
@@ -89,7 +120,7 @@ def test_request_exceeds_budget(api_key: str):
         "provider_filter": ["openai"]
     }
     
-    response = make_request("POST", "/v1/chat/completions", api_key, data)
+    response = await make_request("POST", "/v1/chat/completions", api_key, data)
     
     if response.status_code == 402:
         detail = response.json()['detail']
@@ -102,23 +133,24 @@ def test_request_exceeds_budget(api_key: str):
     print()
 
 
-def test_reset_and_set_reasonable_budget(api_key: str):
+async def test_reset_and_set_reasonable_budget(api_key: str):
     """Reset spending and set reasonable budget."""
     print("=" * 60)
     print("Test 4: Reset and Set Reasonable Budget")
     print("=" * 60)
     
-    # Reset spending
-    response = make_request("POST", "/v1/budget/reset", api_key)
-    print(f"✓ {response.json()['message']}")
-    
-    # Set reasonable limit
-    response = make_request("PUT", "/v1/budget/limit", api_key, params={"limit_usd": 1.00})
-    print(f"✓ New limit: ${response.json()['spending_limit_usd']:.2f}")
+    # Reset spending and set a reasonable limit (independent columns,
+    # so both requests can be in flight at once)
+    reset_response, limit_response = await asyncio.gather(
+        make_request("POST", "/v1/budget/reset", api_key),
+        make_request("PUT", "/v1/budget/limit", api_key, params={"limit_usd": 1.00})
+    )
+    print(f"✓ {reset_response.json()['message']}")
+    print(f"✓ New limit: ${limit_response.json()['spending_limit_usd']:.2f}")
     print()
 
 
-def test_request_within_budget(api_key: str):
+async def test_request_within_budget(api_key: str):
     """Make request within budget."""
     print("=" * 60)
     print("Test 5: Request Within Budget")
@@ -134,7 +166,7 @@ def test_request_within_budget(api_key: str):
         "provider_filter": ["openai"]
     }
     
-    response = make_request("POST", "/v1/chat/completions", api_key, data)
+    response = await make_request("POST", "/v1/chat/completions", api_key, data)
     
     if response.status_code == 200:
         result = response.json()
@@ -149,13 +181,13 @@ def test_request_within_budget(api_key: str):
     print()
 
 
-def test_final_budget_check(api_key: str):
+async def test_final_budget_check(api_key: str):
     """Check final budget status."""
     print("=" * 60)
     print("Test 6: Final Budget Check")
     print("=" * 60)
     
-    response = make_request("GET", "/v1/budget", api_key)
+    response = await make_request("GET", "/v1/budget", api_key)
     data = response.json()
     
     print(f"✓ Total spent: ${data['spending']['total_spent_usd']:.6f}")
@@ -165,18 +197,29 @@ def test_final_budget_check(api_key: str):
     print()
 
 
+async def _main(api_key: str):
+    """Run the budget tests in order, then close the client."""
+    try:
+        # Every step reads or changes the same user's budget, so they run
+        # one after another rather than concurrently
+        await test_check_current_budget(api_key)
+        await test_set_low_budget(api_key)
+        await test_request_exceeds_budget(api_key)
+        await test_reset_and_set_reasonable_budget(api_key)
+        await test_request_within_budget(api_key)
+        await test_final_budget_check(api_key)
+    finally:
+        await _CLIENT.aclose()
+
+
 if __name__ == "__main__":
     print("\n🧪 Testing Budget Enforcement\n")
     
     api_key = get_api_key()
+    _CLIENT = build_client(live="--live" in sys.argv[1:])
     
     try:
-        test_check_current_budget(api_key)
-        test_set_low_budget(api_key)
-        test_request_exceeds_budget(api_key)
-        test_reset_and_set_reasonable_budget(api_key)
-        test_request_within_budget(api_key)
-        test_final_budget_check(api_key)
+        asyncio.run(_main(api_key))
         
         print("=" * 60)
         print("✅ All budget tests complete!")
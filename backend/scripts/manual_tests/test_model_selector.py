@@ -4,13 +4,14 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
-from src.models.database import SessionLocal
+from sqlalchemy.orm import Session
+
+from src.models.database import SessionLocal, engine
 from src.services.model_selector import ModelSelector
 
 
-def test_cheapest_selection():
+def test_cheapest_selection(db: Session):
     """Test finding the cheapest model."""
-    db = SessionLocal()
     selector = ModelSelector(db)
     
     messages = [
@@ -22,25 +23,24 @@ def test_cheapest_selection():
         expected_output_tokens=100
     )
     
-    print("=" * 60)
-    print("Test: Find Cheapest Model")
-    print("=" * 60)
-    print(f"Selected Model: {cheapest['display_name']} ({cheapest['model_id']})")
-    print(f"Provider: {cheapest['provider_name']}")
-    print(f"Estimated Cost: ${cheapest['estimated_cost']:.6f}")
-    print(f"\nCost Breakdown:")
-    print(f"  Input tokens: {cheapest['cost_breakdown']['estimated_input_tokens']}")
-    print(f"  Output tokens: {cheapest['cost_breakdown']['estimated_output_tokens']}")
-    print(f"  Input cost: ${cheapest['cost_breakdown']['estimated_input_cost_usd']:.6f}")
-    print(f"  Output cost: ${cheapest['cost_breakdown']['estimated_output_cost_usd']:.6f}")
-    print()
-    
-    db.close()
+    output = []
+    output.append("=" * 60)
+    output.append("Test: Find Cheapest Model")
+    output.append("=" * 60)
+    output.append(f"Selected Model: {cheapest['display_name']} ({cheapest['model_id']})")
+    output.append(f"Provider: {cheapest['provider_name']}")
+    output.append(f"Estimated Cost: ${cheapest['estimated_cost']:.6f}")
+    output.append(f"\nCost Breakdown:")
+    output.append(f"  Input tokens: {cheapest['cost_breakdown']['estimated_input_tokens']}")
+    output.append(f"  Output tokens: {cheapest['cost_breakdown']['estimated_output_tokens']}")
+    output.append(f"  Input cost: ${cheapest['cost_breakdown']['estimated_input_cost_usd']:.6f}")
+    output.append(f"  Output cost: ${cheapest['cost_breakdown']['estimated_output_cost_usd']:.6f}")
+    output.append("")
+    sys.stdout.write("\n".join(output) + "\n")
 
 
-def test_model_comparison():
+def test_model_comparison(db: Session):
     """Test comparing all models."""
-    db = SessionLocal()
     selector = ModelSelector(db)
     
     messages = [
@@ -52,28 +52,27 @@ def test_model_comparison():
         expected_output_tokens=500  # Longer response expected
     )
     
-    print("=" * 60)
-    print("Test: Model Comparison")
-    print("=" * 60)
-    print(f"Total Models Available: {comparison['total_models']}")
-    print(f"\nCheapest Option:")
-    print(f"  {comparison['cheapest']['display_name']}: ${comparison['cheapest']['estimated_cost']:.6f}")
-    print(f"\nMost Expensive Option:")
-    print(f"  {comparison['most_expensive']['display_name']}: ${comparison['most_expensive']['estimated_cost']:.6f}")
-    print(f"\nPotential Savings: ${comparison['potential_savings_usd']:.6f} ({comparison['savings_percentage']}%)")
-    print(f"\nAll Models (Ranked by Cost):")
+    output = []
+    output.append("=" * 60)
+    output.append("Test: Model Comparison")
+    output.append("=" * 60)
+    output.append(f"Total Models Available: {comparison['total_models']}")
+    output.append(f"\nCheapest Option:")
+    output.append(f"  {comparison['cheapest']['display_name']}: ${comparison['cheapest']['estimated_cost']:.6f}")
+    output.append(f"\nMost Expensive Option:")
+    output.append(f"  {comparison['most_expensive']['display_name']}: ${comparison['most_expensive']['estimated_cost']:.6f}")
+    output.append(f"\nPotential Savings: ${comparison['potential_savings_usd']:.6f} ({comparison['savings_percentage']}%)")
+    output.append(f"\nAll Models (Ranked by Cost):")
     
     for i, model in enumerate(comparison['models'], 1):
-        print(f"  {i}. {model['display_name']}: ${model['estimated_cost']:.6f}")
-    
-    print()
+        output.append(f"  {i}. {model['display_name']}: ${model['estimated_cost']:.6f}")
     
-    db.close()
+    output.append("")
+    sys.stdout.write("\n".join(output) + "\n")
 
 
-def test_provider_filter():
+def test_provider_filter(db: Session):
     """Test filtering by provider."""
-    db = SessionLocal()
     selector = ModelSelector(db)
     
     messages = [
@@ -87,21 +86,20 @@ def test_provider_filter():
         provider_filter=["openai"]
     )
     
-    print("=" * 60)
-    print("Test: Provider Filter (OpenAI only)")
-    print("=" * 60)
+    output = []
+    output.append("=" * 60)
+    output.append("Test: Provider Filter (OpenAI only)")
+    output.append("=" * 60)
     
     for model in ranked:
-        print(f"{model['display_name']} ({model['provider_name']}): ${model['estimated_cost']:.6f}")
-    
-    print()
+        output.append(f"{model['display_name']} ({model['provider_name']}): ${model['estimated_cost']:.6f}")
     
-    db.close()
+    output.append("")
+    sys.stdout.write("\n".join(output) + "\n")
 
 
-def test_max_cost_constraint():
+def test_max_cost_constraint(db: Session):
     """Test maximum cost filtering."""
-    db = SessionLocal()
     selector = ModelSelector(db)
     
     messages = [
@@ -116,25 +114,36 @@ def test_max_cost_constraint():
         max_cost=max_cost
     )
     
-    print("=" * 60)
-    print(f"Test: Max Cost Constraint (${max_cost})")
-    print("=" * 60)
-    print(f"Models under budget: {len(ranked)}")
+    output = []
+    output.append("=" * 60)
+    output.append(f"Test: Max Cost Constraint (${max_cost})")
+    output.append("=" * 60)
+    output.append(f"Models under budget: {len(ranked)}")
     
     for model in ranked:
-        print(f"  {model['display_name']}: ${model['estimated_cost']:.6f}")
+        output.append(f"  {model['display_name']}: ${model['estimated_cost']:.6f}")
     
-    print()
-    
-    db.close()
+    output.append("")
+    sys.stdout.write("\n".join(output) + "\n")
 
 
-if __name__ == "__main__":
+def main():
+    """Run every test on one connection and one transaction, rolled back at the end."""
     print("🧪 Testing Model Selector\n")
     
-    test_cheapest_selection()
-    test_model_comparison()
-    test_provider_filter()
-    test_max_cost_constraint()
-    
-    print("✅ Model selector tests complete!")
\ No newline at end of file
+    with engine.connect() as conn, conn.begin() as tx:
+        db = SessionLocal(bind=conn)
+        try:
+            test_cheapest_selection(db)
+            test_model_comparison(db)
+            test_provider_filter(db)
+            test_max_cost_constraint(db)
+        finally:
+            db.close()
+            tx.rollback()
+    
+    print("✅ Model selector tests complete!")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -4,83 +4,89 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
+from typing import Dict
 from src.services.token_estimator import TokenEstimator
 
+# Shared by every test, so the tokenizer is set up once per run
+_ESTIMATOR = TokenEstimator()
 
-def test_simple_message():
+SIMPLE_MESSAGES = [
+    {"role": "user", "content": "What is the capital of France?"}
+]
+
+CONVERSATION_MESSAGES = [
+    {"role": "system", "content": "You are a helpful assistant."},
+    {"role": "user", "content": "Tell me about Python programming."},
+    {"role": "assistant", "content": "Python is a high-level programming language known for its simplicity and readability."},
+    {"role": "user", "content": "What are its main features?"}
+]
+
+POEM_MESSAGES = [
+    {"role": "user", "content": "Write a short poem about coding."}
+]
+
+
+def test_simple_message(result: Dict[str, int]):
     """Test estimation on a simple message."""
-    estimator = TokenEstimator()
-    
-    messages = [
-        {"role": "user", "content": "What is the capital of France?"}
-    ]
-    
-    result = estimator.estimate_messages_tokens(messages, "gpt-4o-mini")
-    
-    print("=" * 60)
-    print("Test: Simple Question")
-    print("=" * 60)
-    print(f"Message: {messages[0]['content']}")
-    print(f"\nEstimated tokens: {result['estimated_tokens']}")
-    print(f"Buffered tokens: {result['buffered_tokens']}")
-    print(f"Buffer: {((result['buffered_tokens'] / result['estimated_tokens']) - 1) * 100:.1f}%")
-    print()
+    output = []
+    output.append("=" * 60)
+    output.append("Test: Simple Question")
+    output.append("=" * 60)
+    output.append(f"Message: {SIMPLE_MESSAGES[0]['content']}")
+    output.append(f"\nEstimated tokens: {result['estimated_tokens']}")
+    output.append(f"Buffered tokens: {result['buffered_tokens']}")
+    output.append(f"Buffer: {((result['buffered_tokens'] / result['estimated_tokens']) - 1) * 100:.1f}%")
+    output.append("")
+    sys.stdout.write("\n".join(output) + "\n")
 
 
-def test_conversation():
+def test_conversation(result: Dict[str, int]):
     """Test estimation on a multi-turn conversation."""
-    estimator = TokenEstimator()
-    
-    messages = [
-        {"role": "system", "content": "You are a helpful assistant."},
-        {"role": "user", "content": "Tell me about Python programming."},
-        {"role": "assistant", "content": "Python is a high-level programming language known for its simplicity and readability."},
-        {"role": "user", "content": "What are its main features?"}
-    ]
-    
-    result = estimator.estimate_messages_tokens(messages, "gpt-4o-mini")
-    
-    print("=" * 60)
-    print("Test: Multi-turn Conversation")
-    print("=" * 60)
-    print(f"Messages: {len(messages)}")
-    print(f"\nEstimated tokens: {result['estimated_tokens']}")
-    print(f"Buffered tokens: {result['buffered_tokens']}")
-    print()
+    output = []
+    output.append("=" * 60)
+    output.append("Test: Multi-turn Conversation")
+    output.append("=" * 60)
+    output.append(f"Messages: {len(CONVERSATION_MESSAGES)}")
+    output.append(f"\nEstimated tokens: {result['estimated_tokens']}")
+    output.append(f"Buffered tokens: {result['buffered_tokens']}")
+    output.append("")
+    sys.stdout.write("\n".join(output) + "\n")
 
 
-def test_cost_estimation():
+def test_cost_estimation(token_estimate: Dict[str, int]):
     """Test cost estimation."""
-    estimator = TokenEstimator()
-    
-    messages = [
-        {"role": "user", "content": "Write a short poem about coding."}
-    ]
-    
     # GPT-4o-mini pricing
-    result = estimator.estimate_cost(
-        messages=messages,
+    result = _ESTIMATOR.estimate_cost(
+        messages=POEM_MESSAGES,
         model_id="gpt-4o-mini",
         input_price_per_1m=0.15,
         output_price_per_1m=0.60,
-        expected_output_tokens=100
+        expected_output_tokens=100,
+        input_tokens=token_estimate["buffered_tokens"]
     )
     
-    print("=" * 60)
-    print("Test: Cost Estimation")
-    print("=" * 60)
-    print(f"Input tokens: {result['estimated_input_tokens']}")
-    print(f"Output tokens: {result['estimated_output_tokens']}")
-    print(f"Total tokens: {result['estimated_total_tokens']}")
-    print(f"\nInput cost: ${result['estimated_input_cost_usd']:.6f}")
-    print(f"Output cost: ${result['estimated_output_cost_usd']:.6f}")
-    print(f"Total cost: ${result['estimated_total_cost_usd']:.6f}")
-    print()
+    output = []
+    output.append("=" * 60)
+    output.append("Test: Cost Estimation")
+    output.append("=" * 60)
+    output.append(f"Input tokens: {result['estimated_input_tokens']}")
+    output.append(f"Output tokens: {result['estimated_output_tokens']}")
+    output.append(f"Total tokens: {result['estimated_total_tokens']}")
+    output.append(f"\nInput cost: ${result['estimated_input_cost_usd']:.6f}")
+    output.append(f"Output cost: ${result['estimated_output_cost_usd']:.6f}")
+    output.append(f"Total cost: ${result['estimated_total_cost_usd']:.6f}")
+    output.append("")
+    sys.stdout.write("\n".join(output) + "\n")
 
 
 if __name__ == "__main__":
-    test_simple_message()
-    test_conversation()
-    test_cost_estimation()
+    # Tokenize every test's messages in one batch
+    simple, conversation, poem = _ESTIMATOR.estimate_many(
+        [SIMPLE_MESSAGES, CONVERSATION_MESSAGES, POEM_MESSAGES], "gpt-4o-mini"
+    )
+    
+    test_simple_message(simple)
+    test_conversation(conversation)
+    test_cost_estimation(poem)
     
     print("✅ Token estimator tests complete!")
\ No newline at end of file
@@ -1,17 +1,55 @@
 """Analytics API endpoints for dashboard."""
+import base64
+import binascii
+import time
 from datetime import datetime, timedelta
-from typing import Optional, List
+from typing import Annotated, Optional, List, Tuple, Iterator
 import uuid
+import orjson
 from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy import func, and_, or_
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Row, func, and_, or_, select, tuple_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Query as OrmQuery, Session
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from sqlalchemy.sql.visitors import InternalTraversal
 from pydantic import BaseModel
 
 from src.models.database import get_db
 from src.models.schemas import Request, Model, Provider, User
 from src.api.routes import get_current_user
+from src.services.cache_service import CacheService, MODELS_CACHE_KEY
+from src.services.usage_service import UsageService
 
-router = APIRouter(prefix="/v1/analytics", tags=["analytics"])
+# Every analytics endpoint requires a valid API key; endpoints that also
+# declare `user` get the same resolved instance (dependencies are cached
+# per request)
+router = APIRouter(
+    prefix="/v1/analytics",
+    tags=["analytics"],
+    dependencies=[Depends(get_current_user)]
+)
+
+# Usage stats are cached per fixed window of this many seconds
+USAGE_CACHE_SECONDS = 300
+
+# The model catalog only changes when it's re-seeded (which clears the
+# cache); the TTL bounds staleness after edits made any other way
+MODELS_CACHE_SECONDS = 3600
+
+# Above this many estimated matches, report the planner's estimate as the
+# request list total instead of running an exact COUNT(*)
+EXACT_COUNT_LIMIT = 10_000
+
+# Rows fetched from the database per batch while streaming an export
+EXPORT_BATCH_SIZE = 200
+
+# Request history filters, shared by the list and export endpoints
+ModelFilter = Annotated[Optional[str], Query(description="Filter by model ID")]
+StatusFilter = Annotated[Optional[str], Query(description="Filter by status (success/error)")]
+SearchFilter = Annotated[Optional[str], Query(description="Search in prompt text")]
+StartDateFilter = Annotated[Optional[datetime], Query(description="Filter by start date")]
+EndDateFilter = Annotated[Optional[datetime], Query(description="Filter by end date")]
 
 
 # Response models
@@ -68,6 +106,8 @@ class RequestListResponse(BaseModel):
     page: int
     per_page: int
     total_pages: int
+    total_is_estimate: bool = False
+    next_cursor: Optional[str] = None
 
 
 class RequestDetail(BaseModel):
@@ -104,7 +144,7 @@ class ModelInfo(BaseModel):
 
 @router.get("/usage", response_model=UsageResponse)
 async def get_usage_stats(
-    days: int = Query(default=30, ge=1, le=365, description="Number of days to analyze"),
+    days: Annotated[int, Query(ge=1, le=365, description="Number of days to analyze")] = 30,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -120,18 +160,41 @@ async def get_usage_stats(
     - Breakdown by model
     - Daily time series data
     """
-    # Calculate date threshold
-    start_date = datetime.utcnow() - timedelta(days=days)
+    # Key on a fixed time bucket rather than now(), so repeated dashboard
+    # loads within the window share one computation (at most 5 min stale)
+    cache = CacheService()
+    bucket = int(time.time() // USAGE_CACHE_SECONDS)
+    cache_key = f"analytics_usage:{user.id}:{days}:{bucket}"
+    
+    cached = cache.get_json(cache_key)
+    if cached is not None:
+        return cached
+    
+    usage = _compute_usage_stats(user.id, days, db)
+    cache.set_json(cache_key, usage.model_dump(), ttl_seconds=USAGE_CACHE_SECONDS)
+    return usage
+
+
+def _compute_usage_stats(user_id, days: int, db: Session) -> UsageResponse:
+    """
+    Aggregate a user's usage over the last `days` days.
     
-    # Get all requests for this user in date range
-    requests = db.query(Request).filter(
-        and_(
-            Request.user_id == user.id,
-            Request.created_at >= start_date
-        )
-    ).all()
+    Args:
+        user_id: User UUID
+        days: Number of days to look back
+        db: SQLAlchemy session
     
-    if not requests:
+    Returns:
+        UsageResponse
+    """
+    # Snap the threshold to midnight (UTC) so every day in range is whole
+    # and can be served from the daily rollups; only today is read live
+    start_date = datetime.combine(datetime.utcnow().date() - timedelta(days=days), datetime.min.time())
+    
+    # Pre-aggregated per day/provider/model (rollups plus live recent rows)
+    groups = UsageService(db).get_usage_groups(user_id, start_date)
+    
+    if not groups:
         return UsageResponse(
             total_requests=0,
             total_cost_usd=0.0,
@@ -142,21 +205,29 @@ async def get_usage_stats(
             daily_stats=[]
         )
     
+    # Resolve names for just the providers/models that appear
+    provider_names = dict(db.execute(
+        select(Provider.id, Provider.name).where(Provider.id.in_({g.provider_id for g in groups}))
+    ).all())
+    model_names = dict(db.execute(
+        select(Model.id, Model.model_id).where(Model.id.in_({g.model_id for g in groups}))
+    ).all())
+    
     # Calculate total stats
-    total_requests = len(requests)
-    total_cost = sum(r.total_cost_usd or 0 for r in requests)
-    avg_latency = int(sum(r.latency_ms or 0 for r in requests) / total_requests)
-    success_count = sum(1 for r in requests if r.status == "success")
+    total_requests = sum(g.requests for g in groups)
+    total_cost = sum(g.cost_usd for g in groups)
+    avg_latency = int(sum(g.latency_sum_ms for g in groups) / total_requests)
+    success_count = sum(g.success_count for g in groups)
     success_rate = round(success_count / total_requests, 3)
     
     # Group by provider
     provider_map = {}
-    for req in requests:
-        provider_name = db.query(Provider.name).filter(Provider.id == req.provider_id).scalar()
+    for g in groups:
+        provider_name = provider_names.get(g.provider_id)
         if provider_name not in provider_map:
             provider_map[provider_name] = {"requests": 0, "cost": 0.0}
-        provider_map[provider_name]["requests"] += 1
-        provider_map[provider_name]["cost"] += req.total_cost_usd or 0
+        provider_map[provider_name]["requests"] += g.requests
+        provider_map[provider_name]["cost"] += g.cost_usd
     
     by_provider = [
         ProviderStats(
@@ -169,12 +240,12 @@ async def get_usage_stats(
     
     # Group by model
     model_map = {}
-    for req in requests:
-        model_id = db.query(Model.model_id).filter(Model.id == req.model_id).scalar()
+    for g in groups:
+        model_id = model_names.get(g.model_id)
         if model_id not in model_map:
             model_map[model_id] = {"requests": 0, "cost": 0.0}
-        model_map[model_id]["requests"] += 1
-        model_map[model_id]["cost"] += req.total_cost_usd or 0
+        model_map[model_id]["requests"] += g.requests
+        model_map[model_id]["cost"] += g.cost_usd
     
     by_model = [
         ModelStats(
@@ -187,12 +258,12 @@ async def get_usage_stats(
     
     # Group by day
     daily_map = {}
-    for req in requests:
-        date_str = req.created_at.date().isoformat()
+    for g in groups:
+        date_str = g.day.isoformat()
         if date_str not in daily_map:
             daily_map[date_str] = {"requests": 0, "cost": 0.0}
-        daily_map[date_str]["requests"] += 1
-        daily_map[date_str]["cost"] += req.total_cost_usd or 0
+        daily_map[date_str]["requests"] += g.requests
+        daily_map[date_str]["cost"] += g.cost_usd
     
     daily_stats = [
         DailyStats(
@@ -214,59 +285,101 @@ async def get_usage_stats(
     )
 
 
-@router.get("/requests", response_model=RequestListResponse)
-async def get_requests(
-    page: int = Query(default=1, ge=1, description="Page number"),
-    per_page: int = Query(default=20, ge=1, le=100, description="Items per page"),
-    model: Optional[str] = Query(default=None, description="Filter by model ID"),
-    status: Optional[str] = Query(default=None, description="Filter by status (success/error)"),
-    search: Optional[str] = Query(default=None, description="Search in prompt text"),
-    start_date: Optional[datetime] = Query(default=None, description="Filter by start date"),
-    end_date: Optional[datetime] = Query(default=None, description="Filter by end date"),
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+class _Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a statement (PostgreSQL only)."""
+    # Cache key follows the wrapped statement, so the compiled SQL is reused
+    # across filter values like any other query
+    inherit_cache = True
+    _traverse_internals = [("statement", InternalTraversal.dp_clauseelement)]
+    
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def _estimate_count(db: Session, query: OrmQuery) -> Optional[int]:
     """
-    Get paginated list of requests with filtering.
+    Estimate the requests matched by a query when there are many.
     
-    **Query parameters:**
-    - page: Page number (starts at 1)
-    - per_page: Items per page (default 20, max 100)
-    - model: Filter by model ID (e.g., 'gpt-4o-mini')
-    - status: Filter by status ('success' or 'error')
-    - search: Search text in prompt
-    - start_date: Only requests after this date (ISO format)
-    - end_date: Only requests before this date (ISO format)
+    On PostgreSQL the planner's row estimate is checked; beyond
+    EXACT_COUNT_LIMIT it's used as the total rather than scanning every
+    match for an exact COUNT(*).
     
-    **Returns:**
-    - List of request summaries
-    - Pagination metadata
+    Args:
+        db: SQLAlchemy session
+        query: Filtered request query
+    
+    Returns:
+        The estimate, or None if an exact count should be used
     """
-    # Build query
-    query = db.query(Request).filter(Request.user_id == user.id)
+    if db.get_bind().dialect.name == "postgresql":
+        plan = db.execute(_Explain(query.statement)).scalar()
+        estimate = int(plan[0]["Plan"]["Plan Rows"])
+        if estimate > EXACT_COUNT_LIMIT:
+            return estimate
+    
+    return None
+
+
+def _count_column(query: OrmQuery):
+    """
+    COUNT(*) of a query as a scalar subquery, to select alongside a page.
+    
+    Args:
+        query: Filtered request query (before ordering/pagination)
+    
+    Returns:
+        Uncorrelated scalar subquery
+    """
+    return query.with_entities(func.count()).statement.correlate(None).scalar_subquery()
+
+
+def _filter_requests(
+    query: OrmQuery,
+    user: User,
+    model: Optional[str],
+    status: Optional[str],
+    search: Optional[str],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime]
+) -> OrmQuery:
+    """
+    Apply the request history filters to a Request query.
+    
+    Args:
+        query: Query over Request
+        user: Only this user's requests
+        model: Filter by model ID
+        status: Filter by status
+        search: Search in prompt text, model name, and provider name
+        start_date: Only requests created at or after this time
+        end_date: Only requests created at or before this time
+    
+    Returns:
+        Filtered query
+    """
+    query = query.filter(Request.user_id == user.id)
     
     # Apply filters
     if model:
-        model_obj = db.query(Model).filter(Model.model_id == model).first()
-        if model_obj:
-            query = query.filter(Request.model_id == model_obj.id)
-        else:
-            # Model doesn't exist - return empty results
-            query = query.filter(Request.id == None)
+        # Served by the (user_id, model_slug) index
+        query = query.filter(Request.model_slug == model)
     
     if status:
         query = query.filter(Request.status == status)
     
     if search:
         # Search in prompt text, model name, and provider name
-        model_subquery = db.query(Model.id).filter(Model.model_id.ilike(f"%{search}%")).subquery()
-        provider_subquery = db.query(Provider.id).filter(Provider.name.ilike(f"%{search}%")).subquery()
-        
+        # (prompt ILIKE is served by the ix_requests_prompt_text_trgm index)
         query = query.filter(
             or_(
                 Request.prompt_text.ilike(f"%{search}%"),
-                Request.model_id.in_(model_subquery),
-                Request.provider_id.in_(provider_subquery)
+                Request.model_slug.ilike(f"%{search}%"),
+                Request.provider_slug.ilike(f"%{search}%")
             )
         )
     
@@ -276,48 +389,200 @@ async def get_requests(
     if end_date:
         query = query.filter(Request.created_at <= end_date)
     
-    # Get total count
-    total = query.count()
+    return query
+
+
+def _encode_cursor(req: Row) -> str:
+    """Encode a request row's position in the newest-first listing as an opaque cursor."""
+    raw = f"{req.created_at.isoformat()}|{req.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """
+    Decode a cursor from _encode_cursor.
+    
+    Args:
+        cursor: Cursor returned as next_cursor by the list endpoint
+    
+    Returns:
+        Tuple of (created_at, id) of the last request already seen
+    
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    try:
+        created_at, request_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(request_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=422, detail="Invalid cursor")
+
+
+@router.get("/requests", response_model=RequestListResponse)
+async def get_requests(
+    page: Annotated[int, Query(ge=1, description="Page number")] = 1,
+    per_page: Annotated[int, Query(ge=1, le=100, description="Items per page")] = 20,
+    cursor: Annotated[Optional[str], Query(description="Continue after this cursor (from next_cursor)")] = None,
+    model: ModelFilter = None,
+    status: StatusFilter = None,
+    search: SearchFilter = None,
+    start_date: StartDateFilter = None,
+    end_date: EndDateFilter = None,
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get paginated list of requests with filtering.
+    
+    **Query parameters:**
+    - page: Page number (starts at 1)
+    - per_page: Items per page (default 20, max 100)
+    - cursor: next_cursor from a previous page; seeks past it instead of
+      using page (faster for deep pages)
+    - model: Filter by model ID (e.g., 'gpt-4o-mini')
+    - status: Filter by status ('success' or 'error')
+    - search: Search text in prompt
+    - start_date: Only requests after this date (ISO format)
+    - end_date: Only requests before this date (ISO format)
+    
+    **Returns:**
+    - List of request summaries
+    - Pagination metadata, including next_cursor when more requests follow
+      (total is the planner's estimate when total_is_estimate is true)
+    """
+    # Build query
+    query = _filter_requests(
+        db.query(Request), user, model, status, search, start_date, end_date
+    )
+    
+    # Estimated total for very large result sets
+    total = _estimate_count(db, query)
+    total_is_estimate = total is not None
+    filtered = query
+    
+    # Newest first; id breaks ties so every request has a stable position
+    query = query.order_by(Request.created_at.desc(), Request.id.desc())
+    
+    if cursor:
+        # Seek past the last request seen (an index range scan, unlike OFFSET)
+        query = query.filter(tuple_(Request.created_at, Request.id) < _decode_cursor(cursor))
+    else:
+        query = query.offset((page - 1) * per_page)
+    
+    # Only the summary columns, as plain rows (no ORM instances); the full
+    # prompt/response texts can be large. Errors have no usage, so report 0
+    columns = [
+        Request.id,
+        Request.created_at,
+        Request.model_slug.label("model"),
+        Request.provider_slug.label("provider"),
+        Request.prompt_preview,
+        func.coalesce(Request.input_tokens, 0).label("input_tokens"),
+        func.coalesce(Request.output_tokens, 0).label("output_tokens"),
+        func.coalesce(Request.total_cost_usd, 0.0).label("total_cost_usd"),
+        func.coalesce(Request.latency_ms, 0).label("latency_ms"),
+        Request.status
+    ]
+    
+    if not total_is_estimate:
+        # Exact total comes back with the page, saving a COUNT round trip
+        columns.append(_count_column(filtered).label("total"))
+    
+    # One extra row tells whether another page follows
+    requests = query.with_entities(*columns).limit(per_page + 1).all()
+    if not total_is_estimate:
+        # An empty page (past the end) carries no total, so count separately
+        total = requests[0].total if requests else filtered.count()
+    has_more = len(requests) > per_page
+    requests = requests[:per_page]
     
     # Calculate pagination
     total_pages = (total + per_page - 1) // per_page  # Ceiling division
-    offset = (page - 1) * per_page
-    
-    # Get page of results
-    requests = query.order_by(Request.created_at.desc()).offset(offset).limit(per_page).all()
     
     # Build response
-    request_summaries = []
-    for req in requests:
-        # Get model and provider names
-        model_obj = db.query(Model).filter(Model.id == req.model_id).first()
-        provider_obj = db.query(Provider).filter(Provider.id == req.provider_id).first()
-        
-        # Truncate prompt for preview
-        prompt_preview = req.prompt_text[:50] + "..." if len(req.prompt_text) > 50 else req.prompt_text
-        
-        request_summaries.append(RequestSummary(
+    request_summaries = [
+        RequestSummary(
             id=str(req.id),
             created_at=req.created_at.isoformat(),
-            model=model_obj.model_id if model_obj else "unknown",
-            provider=provider_obj.name if provider_obj else "unknown",
-            prompt_preview=prompt_preview,
-            input_tokens=req.input_tokens or 0,
-            output_tokens=req.output_tokens or 0,
-            total_cost_usd=req.total_cost_usd or 0.0,
-            latency_ms=req.latency_ms or 0,
+            model=req.model,
+            provider=req.provider,
+            prompt_preview=req.prompt_preview,
+            input_tokens=req.input_tokens,
+            output_tokens=req.output_tokens,
+            total_cost_usd=req.total_cost_usd,
+            latency_ms=req.latency_ms,
             status=req.status
-        ))
+        )
+        for req in requests
+    ]
     
     return RequestListResponse(
         requests=request_summaries,
         total=total,
         page=page,
         per_page=per_page,
-        total_pages=total_pages
+        total_pages=total_pages,
+        total_is_estimate=total_is_estimate,
+        next_cursor=_encode_cursor(requests[-1]) if has_more else None
     )
 
 
+@router.get("/requests/export")
+async def export_requests(
+    model: ModelFilter = None,
+    status: StatusFilter = None,
+    search: SearchFilter = None,
+    start_date: StartDateFilter = None,
+    end_date: EndDateFilter = None,
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Export every matching request as newline-delimited JSON.
+    
+    Rows are streamed in batches as they're read, so memory stays flat no
+    matter how many requests match.
+    
+    **Query parameters:**
+    - Same filters as GET /v1/analytics/requests
+    
+    **Returns:**
+    - application/x-ndjson, one full request (newest first) per line
+    """
+    query = _filter_requests(
+        db.query(Request), user, model, status, search, start_date, end_date
+    ).order_by(Request.created_at.desc(), Request.id.desc())
+    
+    # The request-scoped session is closed before the body is streamed,
+    # so the export reads through its own session on the same engine
+    bind = db.get_bind()
+    
+    def generate() -> Iterator[bytes]:
+        with Session(bind=bind) as export_db:
+            rows = query.with_session(export_db).yield_per(EXPORT_BATCH_SIZE)
+            for req in rows:
+                yield orjson.dumps({
+                    "id": req.id,
+                    "created_at": req.created_at,
+                    "completed_at": req.completed_at,
+                    "model": req.model_slug,
+                    "provider": req.provider_slug,
+                    "prompt_text": req.prompt_text,
+                    "response_text": req.response_text,
+                    "input_tokens": req.input_tokens,
+                    "output_tokens": req.output_tokens,
+                    "total_tokens": req.total_tokens,
+                    "input_cost_usd": req.input_cost_usd,
+                    "output_cost_usd": req.output_cost_usd,
+                    "total_cost_usd": req.total_cost_usd,
+                    "latency_ms": req.latency_ms,
+                    "status": req.status,
+                    "error_message": req.error_message
+                }) + b"\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
 @router.get("/requests/{request_id}", response_model=RequestDetail)
 async def get_request_detail(
     request_id: str,
@@ -335,14 +600,14 @@ async def get_request_detail(
     """
     # Validate UUID format
     try:
-        uuid.UUID(request_id)
+        request_uuid = uuid.UUID(request_id)
     except ValueError:
         raise HTTPException(status_code=422, detail="Invalid UUID format")
     
     # Find request
     req = db.query(Request).filter(
         and_(
-            Request.id == request_id,
+            Request.id == request_uuid,
             Request.user_id == user.id
         )
     ).first()
@@ -350,16 +615,12 @@ async def get_request_detail(
     if not req:
         raise HTTPException(status_code=404, detail="Request not found")
     
-    # Get model and provider info
-    model_obj = db.query(Model).filter(Model.id == req.model_id).first()
-    provider_obj = db.query(Provider).filter(Provider.id == req.provider_id).first()
-    
     return RequestDetail(
         id=str(req.id),
         created_at=req.created_at.isoformat(),
         completed_at=req.completed_at.isoformat() if req.completed_at else None,
-        model=model_obj.model_id if model_obj else "unknown",
-        provider=provider_obj.name if provider_obj else "unknown",
+        model=req.model_slug,
+        provider=req.provider_slug,
         prompt_text=req.prompt_text,
         response_text=req.response_text,
         input_tokens=req.input_tokens,
@@ -375,16 +636,19 @@ async def get_request_detail(
 
 
 @router.get("/models", response_model=List[ModelInfo])
-async def get_available_models(
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+async def get_available_models(db: Session = Depends(get_db)):
     """
     Get list of all available models with pricing.
     
     **Returns:**
     - List of all models with their configuration
     """
+    # Same catalog for every user, so one shared cache entry
+    cache = CacheService()
+    cached = cache.get_json(MODELS_CACHE_KEY)
+    if cached is not None:
+        return cached
+    
     models = db.query(Model).join(Provider).filter(Model.is_active == True).all()
     
     result = []
@@ -400,4 +664,9 @@ async def get_available_models(
             is_active=model.is_active
         ))
     
+    cache.set_json(
+        MODELS_CACHE_KEY,
+        [info.model_dump() for info in result],
+        ttl_seconds=MODELS_CACHE_SECONDS
+    )
     return result
\ No newline at end of file
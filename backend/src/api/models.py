@@ -101,6 +101,7 @@ class ComparisonResult(BaseModel):
     latency_ms: int
     status: str
     error_message: Optional[str] = None
+    request_id: Optional[str] = None  # Logged request ID (None if nothing was logged)
 
 class ComparisonResponse(BaseModel):
     """Response model for A/B comparison endpoint."""
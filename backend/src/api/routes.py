@@ -1,9 +1,12 @@
 """API routes."""
 import uuid
 from datetime import datetime
+from threading import Lock
 from typing import Dict, List, Optional
+from cachetools import TTLCache
 from fastapi import APIRouter, Depends, HTTPException, Header
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.exc import ObjectDeletedError
 
 from src.api.models import (
     ChatCompletionRequest, ChatCompletionResponse, UsageInfo,
@@ -12,26 +15,79 @@ from src.api.models import (
 )
 from src.models.database import get_db
 from src.models.schemas import User, Model, Request
-from src.providers.openai_provider import OpenAIProvider
+from src.providers.registry import get_provider
 from src.services.cost_calculator import calculate_cost
 from src.services.model_selector import ModelSelector
 from src.services.budget_service import BudgetService
 from src.services.cache_service import CacheService
 from src.services.comparison_service import ComparisonService
 from src.services.batch_service import BatchService
+from src.utils.api_keys import hash_api_key
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 router = APIRouter()
 
+# Re-check the budget with exact token counts when a rough estimate
+# comes within this fraction of the remaining budget
+BUDGET_RECHECK_MARGIN = 0.10
+
+# How long a resolved API key is trusted before hitting the database again
+API_KEY_CACHE_SECONDS = 60
+
+# api_key_hash -> user_id
+_api_key_cache = TTLCache(maxsize=10_000, ttl=API_KEY_CACHE_SECONDS)
+_api_key_cache_lock = Lock()
+
+
+def invalidate_api_key(api_key: Optional[str] = None) -> None:
+    """
+    Drop a cached API key lookup, e.g. after rotating the key.
+    
+    Args:
+        api_key: Plaintext API key, or None to clear every entry
+    """
+    with _api_key_cache_lock:
+        if api_key is None:
+            _api_key_cache.clear()
+        else:
+            _api_key_cache.pop(hash_api_key(api_key), None)
+
 
 def get_current_user(
     x_api_key: str = Header(..., alias="X-API-Key", description="API Key"),
     db: Session = Depends(get_db)
 ) -> User:
-    """Validate API key and return user."""
-    user = db.query(User).filter(User.api_key == x_api_key).first()
-    if not user or not user.is_active:
+    """
+    Validate API key and return user.
+    
+    Only the key -> user ID mapping is cached; is_active is read from the
+    user row on every request, so deactivation takes effect immediately.
+    """
+    key_hash = hash_api_key(x_api_key)
+    with _api_key_cache_lock:
+        user_id = _api_key_cache.get(key_hash)
+    
+    if user_id is None:
+        user = db.query(User).filter(User.api_key_hash == key_hash).first()
+        if not user:
+            raise HTTPException(status_code=401, detail="Invalid or inactive API key")
+        with _api_key_cache_lock:
+            _api_key_cache[key_hash] = user.id
+    else:
+        # Attach by primary key without a SELECT; other columns (is_active,
+        # budget totals) load fresh together on first access
+        user = User(id=user_id)
+        make_transient_to_detached(user)
+        user = db.merge(user, load=False)
+    
+    try:
+        is_active = user.is_active
+    except ObjectDeletedError:
+        invalidate_api_key(x_api_key)
+        raise HTTPException(status_code=401, detail="Invalid or inactive API key")
+    
+    if not is_active:
         raise HTTPException(status_code=401, detail="Invalid or inactive API key")
     return user
 
@@ -52,20 +108,9 @@ async def _send_to_provider(
     Returns:
         Result dict from provider
     """
-    from src.providers.anthropic_provider import AnthropicProvider
-    from src.providers.deepseek_provider import DeepSeekProvider
-    from src.providers.google_provider import GoogleProvider
-    
     # Route to correct provider
-    if model.provider.name == "openai":
-        provider = OpenAIProvider()
-    elif model.provider.name == "anthropic":
-        provider = AnthropicProvider()
-    elif model.provider.name == "deepseek":
-        provider = DeepSeekProvider()
-    elif model.provider.name == "google":
-        provider = GoogleProvider()
-    else:
+    provider = get_provider(model.provider.name)
+    if provider is None:
         raise HTTPException(
             status_code=500,
             detail=f"Provider {model.provider.name} not supported"
@@ -113,16 +158,31 @@ async def chat_completion(
     
     if request.mode == "cost-optimized":
         selector = ModelSelector(db)
+        # Start with a cheap byte-length estimate; tokenizing is only
+        # worth it when the request is close to the user's limit. This
+        # estimate only gates the request: model selection and the
+        # estimated_cost reported below use the tokenizer.
         cheapest = selector.get_cheapest_model(
             messages=messages,
             expected_output_tokens=request.expected_output_tokens,
-            provider_filter=request.provider_filter
+            provider_filter=request.provider_filter,
+            fast_estimate=True
         )
         
         if cheapest:
             estimated_cost = cheapest["estimated_cost"]
             budget_check = budget_service.check_budget(user.id, estimated_cost)
             
+            remaining = budget_check.get("remaining_budget_usd")
+            if remaining is not None and estimated_cost >= remaining * (1 - BUDGET_RECHECK_MARGIN):
+                cheapest = selector.get_cheapest_model(
+                    messages=messages,
+                    expected_output_tokens=request.expected_output_tokens,
+                    provider_filter=request.provider_filter
+                )
+                estimated_cost = cheapest["estimated_cost"]
+                budget_check = budget_service.check_budget(user.id, estimated_cost)
+            
             if not budget_check["approved"]:
                 raise HTTPException(
                     status_code=402,  # Payment Required
@@ -161,7 +221,7 @@ async def chat_completion(
         cached_response = cache_service.get(
             messages=messages,
             model_id=model.model_id,
-            temperature=request.temperature or 0.7,
+            temperature=CacheService.cache_temperature(request.temperature),
             max_tokens=request.max_tokens
         )
         
@@ -203,6 +263,8 @@ async def chat_completion(
                 user_id=user.id,
                 model_id=model.id,
                 provider_id=model.provider_id,
+                model_slug=model.model_id,
+                provider_slug=model.provider.name,
                 prompt_text=prompt_text,
                 response_text=None,
                 status="error",
@@ -222,7 +284,7 @@ async def chat_completion(
             messages=messages,
             model_id=model.model_id,
             response=result,
-            temperature=request.temperature or 0.7,
+            temperature=CacheService.cache_temperature(request.temperature),
             max_tokens=request.max_tokens,
             ttl_seconds=3600  # 1 hour default
         )
@@ -235,7 +297,7 @@ async def chat_completion(
     else:
         selector = ModelSelector(db)
         
-        # Get ranked models
+        # Get ranked models (tokenized, not the budget pre-check's fast estimate)
         ranked_models = selector.get_ranked_models(
             messages=messages,
             expected_output_tokens=request.expected_output_tokens,
@@ -306,6 +368,8 @@ async def chat_completion(
         user_id=user.id,
         model_id=model.id,
         provider_id=model.provider_id,
+        model_slug=model.model_id,
+        provider_slug=model.provider.name,
         prompt_text=prompt_text,
         response_text=result["content"],
         input_tokens=usage["input_tokens"],
@@ -1,15 +1,20 @@
 """Main FastAPI application."""
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from src.api.routes import router
 from src.api.analytics_routes import router as analytics_router
+from src.providers.base_provider import close_http_client
+from src.providers.registry import get_providers
 
 # Create FastAPI app
 app = FastAPI(
     title="AI Model Router",
     description="Route LLM requests with cost tracking and observability",
-    version="0.1.0"
+    version="0.1.0",
+    # Analytics payloads are large nested lists; orjson renders them faster
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware (for frontend later)
@@ -26,6 +31,18 @@ app.include_router(router)
 app.include_router(analytics_router)
 
 
+@app.on_event("startup")
+async def init_providers():
+    """Create the shared provider instances before serving requests."""
+    get_providers()
+
+
+@app.on_event("shutdown")
+async def close_providers():
+    """Close pooled provider connections."""
+    await close_http_client()
+
+
 @app.get("/")
 async def root():
     """Root endpoint."""
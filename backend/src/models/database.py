@@ -1,5 +1,5 @@
 """Database configuration and session management."""
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from pydantic_settings import BaseSettings
@@ -16,6 +16,8 @@ class Settings(BaseSettings):
     redis_url: str = "redis://localhost:6379/0"
     app_env: Optional[str] = "development"
     log_level: Optional[str] = "INFO"
+    # Approximate short ASCII texts instead of tokenizing them (tests/dev only)
+    fast_token_estimate: bool = False
     
     class Config:
         env_file = ".env"
@@ -24,11 +26,23 @@ class Settings(BaseSettings):
 
 settings = Settings()
 
+# Driver-specific engine options (postgresql:// URLs use the psycopg2 driver)
+engine_options = {}
+if make_url(settings.database_url).get_dialect().driver == "psycopg2":
+    # Bulk INSERTs go out as multi-row VALUES pages; other executemany
+    # statements (UPDATE/DELETE) use psycopg2's execute_batch
+    engine_options["executemany_mode"] = "values_plus_batch"
+
 # Create SQLAlchemy engine
 engine = create_engine(
     settings.database_url,
     pool_pre_ping=True,  # Verify connections before using
-    echo=True  # Log SQL queries (helpful for learning)
+    insertmanyvalues_page_size=1000,
+    # Room for every statement shape (filter combinations included) so
+    # compiled SQL is reused rather than recompiled
+    query_cache_size=1200,
+    echo=True,  # Log SQL queries (helpful for learning)
+    **engine_options
 )
 
 # Create session factory
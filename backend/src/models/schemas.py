@@ -1,19 +1,29 @@
 """SQLAlchemy models for database tables."""
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, Float, DateTime, Text, ForeignKey, Boolean
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.dialects.postgresql import JSON
+from functools import cached_property
+from sqlalchemy import Column, String, Integer, BigInteger, Float, Date, DateTime, Text, ForeignKey, Boolean, LargeBinary, UniqueConstraint, Index
+from sqlalchemy import DDL, JSON, Uuid, event, text
 from sqlalchemy.orm import relationship
 from .database import Base
+from src.utils.api_keys import hash_api_key
+from src.utils.prompt_preview import PROMPT_PREVIEW_LENGTH, make_prompt_preview
 
 
 class User(Base):
     """Users table - tracks API key holders."""
     __tablename__ = "users"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     api_key = Column(String(64), unique=True, nullable=False, index=True)
+    # Lookup key for authentication; derived from api_key when not given
+    api_key_hash = Column(
+        LargeBinary(16),
+        unique=True,
+        nullable=False,
+        index=True,
+        default=lambda ctx: hash_api_key(ctx.get_current_parameters()['api_key'])
+    )
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
     spending_limit_usd = Column(Float, nullable=True)
@@ -42,6 +52,9 @@ class Provider(Base):
 class Model(Base):
     """LLM models with pricing information."""
     __tablename__ = "models"
+    __table_args__ = (
+        UniqueConstraint("provider_id", "model_id", name="uq_models_provider_id_model_id"),
+    )
     
     id = Column(Integer, primary_key=True)
     provider_id = Column(Integer, ForeignKey("providers.id"), nullable=False)
@@ -56,13 +69,23 @@ class Model(Base):
     # Relationships
     provider = relationship("Provider", back_populates="models")
     requests = relationship("Request", back_populates="model")
+    
+    @cached_property
+    def input_price_per_token(self) -> float:
+        """Input price per single token (USD)."""
+        return self.input_price_per_1m_tokens / 1_000_000
+    
+    @cached_property
+    def output_price_per_token(self) -> float:
+        """Output price per single token (USD)."""
+        return self.output_price_per_1m_tokens / 1_000_000
 
 class Comparison(Base):
     """Comparison of multiple models on the same prompt."""
     __tablename__ = "comparisons"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id"), nullable=False)
     prompt_text = Column(Text, nullable=False)
     models_used = Column(JSON, nullable=False)  # List of model IDs
     total_cost_usd = Column(Float, nullable=False, default=0.0)
@@ -76,17 +99,70 @@ class Comparison(Base):
 class Request(Base):
     """Log of all LLM requests and responses."""
     __tablename__ = "requests"
-    
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    __table_args__ = (
+        # Serves the newest-first history listing and its keyset pagination.
+        # The INCLUDE columns cover the list's summary columns and the live
+        # usage aggregation, so both can be index-only scans (PostgreSQL 11+)
+        Index(
+            "ix_requests_user_id_created_at_id_covering",
+            "user_id",
+            "created_at",
+            "id",
+            postgresql_include=[
+                "model_id",
+                "provider_id",
+                "model_slug",
+                "provider_slug",
+                "prompt_preview",
+                "status",
+                "input_tokens",
+                "output_tokens",
+                "total_cost_usd",
+                "latency_ms",
+            ]
+        ),
+        Index("ix_requests_user_id_model_slug", "user_id", "model_slug"),
+        # Errors are a small minority, so the status=error listing gets a
+        # small partial index rather than an index over every status
+        Index(
+            "ix_requests_user_id_created_at_errors",
+            "user_id",
+            "created_at",
+            postgresql_where=text("status = 'error'"),
+            sqlite_where=text("status = 'error'")
+        ),
+        # Trigram index so the history search's ILIKE '%term%' is an index
+        # probe rather than a full scan (PostgreSQL only)
+        Index(
+            "ix_requests_prompt_text_trgm",
+            "prompt_text",
+            postgresql_using="gin",
+            postgresql_ops={"prompt_text": "gin_trgm_ops"}
+        ).ddl_if(dialect="postgresql"),
+    )
+    
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
     model_id = Column(Integer, ForeignKey("models.id"), nullable=False)
     provider_id = Column(Integer, ForeignKey("providers.id"), nullable=False)
-    comparison_id = Column(UUID(as_uuid=True), ForeignKey("comparisons.id"), nullable=True)
+    comparison_id = Column(Uuid(as_uuid=True), ForeignKey("comparisons.id"), nullable=True)
     comparison = relationship("Comparison", back_populates="requests")
     
+    # Copies of Model.model_id and Provider.name, written with the request
+    # so history reads don't need to join or look them up
+    model_slug = Column(String(100), nullable=False)
+    provider_slug = Column(String(50), nullable=False)
+    
     # Request/Response content
     prompt_text = Column(Text, nullable=False)
     response_text = Column(Text)
+    # Short copy for list views, so they never read the full prompt;
+    # derived from prompt_text when not given
+    prompt_preview = Column(
+        String(PROMPT_PREVIEW_LENGTH + 3),
+        nullable=False,
+        default=lambda ctx: make_prompt_preview(ctx.get_current_parameters()['prompt_text'])
+    )
     
     # Token usage
     input_tokens = Column(Integer)
@@ -112,4 +188,29 @@ class Request(Base):
     # Relationships
     user = relationship("User", back_populates="requests")
     model = relationship("Model", back_populates="requests")
-    provider = relationship("Provider", back_populates="requests")
\ No newline at end of file
+    provider = relationship("Provider", back_populates="requests")
+
+
+class UsageDaily(Base):
+    """Per-day rollup of requests (see services/usage_service.py)."""
+    __tablename__ = "usage_daily"
+    
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    provider_id = Column(Integer, ForeignKey("providers.id"), primary_key=True)
+    model_id = Column(Integer, ForeignKey("models.id"), primary_key=True)
+    
+    requests = Column(Integer, nullable=False)
+    success_count = Column(Integer, nullable=False)
+    input_tokens = Column(BigInteger, nullable=False)
+    output_tokens = Column(BigInteger, nullable=False)
+    cost_usd = Column(Float, nullable=False)
+    latency_sum_ms = Column(BigInteger, nullable=False)
+
+
+# gin_trgm_ops comes from the pg_trgm extension
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
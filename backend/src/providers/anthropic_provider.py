@@ -1,18 +1,39 @@
 """Anthropic provider implementation."""
 import time
-from typing import List, Dict, Any
-from anthropic import Anthropic
+from typing import List, Dict, Any, Optional
+import httpx
+from anthropic import AsyncAnthropic
 
 from src.models.database import settings
+from src.providers.base_provider import LLMProvider, get_http_client
+from src.providers.retry import retry
 
 
-class AnthropicProvider:
+class AnthropicProvider(LLMProvider):
     """Handle requests to Anthropic API."""
     
-    def __init__(self):
-        self.client = Anthropic(api_key=settings.anthropic_api_key)
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
+        """
+        Initialize the provider.
+        
+        Args:
+            http_client: HTTP client to send requests with (defaults to the
+                shared pooled client)
+        """
+        super().__init__(api_key=settings.anthropic_api_key)
+        # Retries are handled by our own retry decorator
+        self.client = AsyncAnthropic(
+            api_key=settings.anthropic_api_key,
+            http_client=http_client or get_http_client(),
+            max_retries=0
+        )
         self.base_url = "https://api.anthropic.com"
     
+    @retry()
+    async def _create_message(self, **params) -> Any:
+        """Call the messages API, retrying transient failures."""
+        return await self.client.messages.create(**params)
+    
     async def send_request(
         self,
         messages: List[Dict[str, str]],
@@ -30,7 +51,7 @@ class AnthropicProvider:
         Returns:
             Dict with response data and metadata
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
             # Convert messages to Anthropic format
@@ -59,32 +80,16 @@ class AnthropicProvider:
                 request_params["temperature"] = kwargs["temperature"]
             
             # Call Anthropic API
-            response = self.client.messages.create(**request_params)
+            response = await self._create_message(**request_params)
             
-            latency_ms = int((time.time() - start_time) * 1000)
+            latency_ms = int((time.perf_counter() - start_time) * 1000)
             
             # Safety checks
             if not hasattr(response, 'content') or not response.content:
-                return {
-                    "success": False,
-                    "content": None,
-                    "finish_reason": None,
-                    "usage": None,
-                    "latency_ms": latency_ms,
-                    "model": model,
-                    "error": "No content returned from Anthropic API"
-                }
+                return self._err("No content returned from Anthropic API", latency_ms, model)
             
             if len(response.content) == 0:
-                return {
-                    "success": False,
-                    "content": None,
-                    "finish_reason": None,
-                    "usage": None,
-                    "latency_ms": latency_ms,
-                    "model": model,
-                    "error": "Empty content array from Anthropic API"
-                }
+                return self._err("Empty content array from Anthropic API", latency_ms, model)
             
             # Extract content
             content_block = response.content[0]
@@ -92,51 +97,59 @@ class AnthropicProvider:
             
             # Safety check for usage
             if not hasattr(response, 'usage') or response.usage is None:
-                return {
-                    "success": False,
-                    "content": content,
-                    "finish_reason": response.stop_reason if hasattr(response, 'stop_reason') else None,
-                    "usage": None,
-                    "latency_ms": latency_ms,
-                    "model": model,
-                    "error": "No usage data returned from Anthropic API"
-                }
+                return self._err(
+                    "No usage data returned from Anthropic API",
+                    latency_ms,
+                    model,
+                    content=content,
+                    finish_reason=response.stop_reason if hasattr(response, 'stop_reason') else None
+                )
             
-            return {
-                "success": True,
-                "content": content,
-                "finish_reason": response.stop_reason,
-                "usage": {
+            return self._ok(
+                content=content,
+                finish_reason=response.stop_reason,
+                usage={
                     "input_tokens": response.usage.input_tokens,
                     "output_tokens": response.usage.output_tokens,
                     "total_tokens": response.usage.input_tokens + response.usage.output_tokens
                 },
-                "latency_ms": latency_ms,
-                "model": model,
-                "error": None
-            }
+                latency_ms=latency_ms,
+                model=model
+            )
             
         except Exception as e:
-            latency_ms = int((time.time() - start_time) * 1000)
-            return {
-                "success": False,
-                "content": None,
-                "finish_reason": None,
-                "usage": None,
-                "latency_ms": latency_ms,
-                "model": model,
-                "error": str(e)
-            }
+            latency_ms = int((time.perf_counter() - start_time) * 1000)
+            return self._err(str(e), latency_ms, model)
     
-    def count_tokens(self, text: str) -> int:
+    @property
+    def provider_name(self) -> str:
+        """Return the provider name."""
+        return "anthropic"
+    
+    def count_tokens(self, text: str, model: Optional[str] = None) -> int:
         """
         Estimate token count for Anthropic models.
         Uses rough approximation of 4 characters per token.
         
         Args:
             text: Text to count tokens for
+            model: Model name (unused)
+        
+        Returns:
+            Estimated number of tokens
+        """
+        return len(text) // 4
+    
+    def count_messages_tokens(self, messages: List[Dict[str, str]], model: str) -> int:
+        """
+        Estimate token count for a list of messages.
+        Uses the same 4 characters per token approximation.
+        
+        Args:
+            messages: List of message dicts
+            model: Model name (unused)
         
         Returns:
             Estimated number of tokens
         """
-        return len(text) // 4
\ No newline at end of file
+        return sum(self.count_tokens(msg["content"]) for msg in messages)
\ No newline at end of file
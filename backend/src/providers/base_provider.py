@@ -1,6 +1,57 @@
 """Base provider interface for LLM providers."""
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+
+import httpx
+
+from src.providers.retry import RetryBudget, held_slot
+
+# A single request in a batch: (messages, model, kwargs)
+BatchItem = Tuple[List[Dict[str, str]], str, Dict[str, Any]]
+
+# Connection pool settings for provider HTTP clients
+HTTP_POOL_LIMITS = httpx.Limits(max_connections=200, max_keepalive_connections=100)
+
+# LLM responses can take minutes; only the connect phase should fail fast
+HTTP_TIMEOUT = httpx.Timeout(600.0, connect=5.0)
+
+
+def build_http_client() -> httpx.AsyncClient:
+    """
+    Create a pooled async HTTP client for a provider SDK.
+    
+    Returns:
+        httpx.AsyncClient that keeps connections alive between requests
+    """
+    return httpx.AsyncClient(limits=HTTP_POOL_LIMITS, timeout=HTTP_TIMEOUT)
+
+
+_shared_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the process-wide HTTP client shared by all HTTP-based providers.
+    
+    One pool means keep-alive connections (and their TLS sessions) are
+    reused across providers and requests.
+    
+    Returns:
+        Shared httpx.AsyncClient
+    """
+    global _shared_http_client
+    if _shared_http_client is None or _shared_http_client.is_closed:
+        _shared_http_client = build_http_client()
+    return _shared_http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client (call on application shutdown)."""
+    global _shared_http_client
+    if _shared_http_client is not None:
+        await _shared_http_client.aclose()
+        _shared_http_client = None
 
 
 class LLMProvider(ABC):
@@ -14,6 +65,15 @@ class LLMProvider(ABC):
     easy to add new providers and switch between them.
     """
     
+    # Maximum number of in-flight requests per provider instance
+    # (subclasses override this to match their provider's rate limits)
+    MAX_CONCURRENCY = 20
+    
+    # Retries allowed per provider instance: a burst of RETRY_BUDGET_BURST,
+    # then RETRY_BUDGET_PER_SECOND on average (see RetryBudget)
+    RETRY_BUDGET_BURST = 10
+    RETRY_BUDGET_PER_SECOND = 1.0
+    
     def __init__(self, api_key: str):
         """
         Initialize provider with API key.
@@ -22,6 +82,8 @@ class LLMProvider(ABC):
             api_key: API key for the provider
         """
         self.api_key = api_key
+        self._sem = asyncio.Semaphore(self.MAX_CONCURRENCY)
+        self._retry_budget = RetryBudget(self.RETRY_BUDGET_BURST, self.RETRY_BUDGET_PER_SECOND)
     
     @abstractmethod
     async def send_request(
@@ -56,6 +118,90 @@ class LLMProvider(ABC):
         """
         pass
     
+    @staticmethod
+    def _ok(
+        content: str,
+        finish_reason: str,
+        usage: Dict[str, int],
+        latency_ms: int,
+        model: str
+    ) -> Dict[str, Any]:
+        """Build a standardized success result."""
+        return {
+            "success": True,
+            "content": content,
+            "finish_reason": finish_reason,
+            "usage": usage,
+            "latency_ms": latency_ms,
+            "model": model,
+            "error": None
+        }
+    
+    @staticmethod
+    def _err(
+        error: str,
+        latency_ms: int,
+        model: str,
+        content: Optional[str] = None,
+        finish_reason: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build a standardized error result."""
+        return {
+            "success": False,
+            "content": content,
+            "finish_reason": finish_reason,
+            "usage": None,
+            "latency_ms": latency_ms,
+            "model": model,
+            "error": error
+        }
+    
+    async def send_request_bounded(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Send a chat completion request once a concurrency slot is free.
+        
+        All bounded calls on this provider instance share one semaphore
+        sized by MAX_CONCURRENCY, keeping us under the provider's rate limits.
+        The slot is given back while the call waits to retry.
+        
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            model: Model ID
+            **kwargs: Additional parameters (temperature, max_tokens, etc.)
+        
+        Returns:
+            Dict with response data (same format as send_request)
+        """
+        async with self._sem:
+            token = held_slot.set(self._sem)
+            try:
+                return await self.send_request(messages, model, **kwargs)
+            finally:
+                held_slot.reset(token)
+    
+    async def send_requests(self, batch: List[BatchItem]) -> List[Dict[str, Any]]:
+        """
+        Send many chat completion requests concurrently.
+        
+        Requests run in parallel, bounded by MAX_CONCURRENCY so large
+        fan-outs don't trip provider rate limits.
+        
+        Args:
+            batch: List of (messages, model, kwargs) tuples
+        
+        Returns:
+            List of result dicts (same format as send_request), in input order
+        """
+        return await asyncio.gather(*[
+            self.send_request_bounded(messages, model, **kwargs)
+            for messages, model, kwargs in batch
+        ])
+    
     @abstractmethod
     def count_tokens(self, text: str, model: str) -> int:
         """
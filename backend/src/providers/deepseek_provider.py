@@ -1,22 +1,40 @@
 """DeepSeek provider implementation."""
 import time
-from typing import List, Dict, Any
-from openai import OpenAI
+from typing import List, Dict, Any, Optional
+import httpx
+from openai import AsyncOpenAI
 
 from src.models.database import settings
+from src.providers.base_provider import LLMProvider, get_http_client
+from src.providers.retry import retry
 
 
-class DeepSeekProvider:
+class DeepSeekProvider(LLMProvider):
     """Handle requests to DeepSeek API."""
     
-    def __init__(self):
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
+        """
+        Initialize the provider.
+        
+        Args:
+            http_client: HTTP client to send requests with (defaults to the
+                shared pooled client)
+        """
+        super().__init__(api_key=settings.deepseek_api_key)
         # DeepSeek uses OpenAI-compatible API
-        self.client = OpenAI(
+        self.client = AsyncOpenAI(
             api_key=settings.deepseek_api_key,
-            base_url="https://api.deepseek.com"
+            base_url="https://api.deepseek.com",
+            http_client=http_client or get_http_client(),
+            max_retries=0  # Retries are handled by our own retry decorator
         )
         self.base_url = "https://api.deepseek.com"
     
+    @retry()
+    async def _create_completion(self, **params) -> Any:
+        """Call the chat completions API, retrying transient failures."""
+        return await self.client.chat.completions.create(**params)
+    
     async def send_request(
         self,
         messages: List[Dict[str, str]],
@@ -34,80 +52,80 @@ class DeepSeekProvider:
         Returns:
             Dict with response data and metadata
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
-            response = self.client.chat.completions.create(
+            response = await self._create_completion(
                 model=model,
                 messages=messages,
                 **kwargs
             )
             
-            latency_ms = int((time.time() - start_time) * 1000)
+            latency_ms = int((time.perf_counter() - start_time) * 1000)
             
             # Safety check: ensure choices exist
             if not response.choices or len(response.choices) == 0:
-                return {
-                    "success": False,
-                    "content": None,
-                    "finish_reason": None,
-                    "usage": None,
-                    "latency_ms": latency_ms,
-                    "model": model,
-                    "error": "No choices returned from DeepSeek API"
-                }
+                return self._err("No choices returned from DeepSeek API", latency_ms, model)
             
             choice = response.choices[0]
             
             # Safety check: ensure usage exists
             if not hasattr(response, 'usage') or response.usage is None:
-                return {
-                    "success": False,
-                    "content": choice.message.content,
-                    "finish_reason": choice.finish_reason,
-                    "usage": None,
-                    "latency_ms": latency_ms,
-                    "model": model,
-                    "error": "No usage data returned from DeepSeek API"
-                }
+                return self._err(
+                    "No usage data returned from DeepSeek API",
+                    latency_ms,
+                    model,
+                    content=choice.message.content,
+                    finish_reason=choice.finish_reason
+                )
             
             usage = response.usage
             
-            return {
-                "success": True,
-                "content": choice.message.content,
-                "finish_reason": choice.finish_reason,
-                "usage": {
+            return self._ok(
+                content=choice.message.content,
+                finish_reason=choice.finish_reason,
+                usage={
                     "input_tokens": usage.prompt_tokens,
                     "output_tokens": usage.completion_tokens,
                     "total_tokens": usage.total_tokens
                 },
-                "latency_ms": latency_ms,
-                "model": response.model,
-                "error": None
-            }
+                latency_ms=latency_ms,
+                model=response.model
+            )
             
         except Exception as e:
-            latency_ms = int((time.time() - start_time) * 1000)
-            return {
-                "success": False,
-                "content": None,
-                "finish_reason": None,
-                "usage": None,
-                "latency_ms": latency_ms,
-                "model": model,
-                "error": str(e)
-            }
+            latency_ms = int((time.perf_counter() - start_time) * 1000)
+            return self._err(str(e), latency_ms, model)
     
-    def count_tokens(self, text: str) -> int:
+    @property
+    def provider_name(self) -> str:
+        """Return the provider name."""
+        return "deepseek"
+    
+    def count_tokens(self, text: str, model: Optional[str] = None) -> int:
         """
         Estimate token count for DeepSeek models.
         Uses rough approximation of 4 characters per token.
         
         Args:
             text: Text to count tokens for
+            model: Model name (unused)
+        
+        Returns:
+            Estimated number of tokens
+        """
+        return len(text) // 4
+    
+    def count_messages_tokens(self, messages: List[Dict[str, str]], model: str) -> int:
+        """
+        Estimate token count for a list of messages.
+        Uses the same 4 characters per token approximation.
+        
+        Args:
+            messages: List of message dicts
+            model: Model name (unused)
         
         Returns:
             Estimated number of tokens
         """
-        return len(text) // 4
\ No newline at end of file
+        return sum(self.count_tokens(msg["content"]) for msg in messages)
\ No newline at end of file
@@ -1,18 +1,27 @@
 """Google Gemini provider implementation."""
 import time
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import google.generativeai as genai
+from google.ai.generativelanguage_v1beta.types import Content, Part
 
 from src.models.database import settings
+from src.providers.base_provider import LLMProvider
+from src.providers.retry import retry
 
 
-class GoogleProvider:
+class GoogleProvider(LLMProvider):
     """Handle requests to Google Gemini API."""
     
     def __init__(self):
+        super().__init__(api_key=settings.google_api_key)
         genai.configure(api_key=settings.google_api_key)
         self.base_url = "https://generativelanguage.googleapis.com"
     
+    @retry()
+    async def _generate_content(self, model_instance: Any, contents: Any, **params) -> Any:
+        """Call the generate content API, retrying transient failures."""
+        return await model_instance.generate_content_async(contents, **params)
+    
     async def send_request(
         self,
         messages: List[Dict[str, str]],
@@ -30,23 +39,25 @@ class GoogleProvider:
         Returns:
             Dict with response data and metadata
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
-            # Convert messages to Gemini format
-            gemini_messages = []
-            for msg in messages:
-                role = "user" if msg["role"] in ["user", "system"] else "model"
-                gemini_messages.append({
-                    "role": role,
-                    "parts": [{"text": msg["content"]}]
-                })
+            # Convert messages to Gemini Content protos (avoids the SDK's
+            # dict-to-proto conversion on every call)
+            gemini_messages = [
+                Content(
+                    role="user" if msg["role"] in ("user", "system") else "model",
+                    parts=[Part(text=msg["content"])]
+                )
+                for msg in messages
+            ]
             
             # Get model instance
             model_instance = genai.GenerativeModel(model)
             
             # Generate response
-            response = model_instance.generate_content(
+            response = await self._generate_content(
+                model_instance,
                 gemini_messages,
                 generation_config=genai.GenerationConfig(
                     temperature=kwargs.get("temperature", 0.7),
@@ -54,66 +65,26 @@ class GoogleProvider:
                 )
             )
             
-            latency_ms = int((time.time() - start_time) * 1000)
+            latency_ms = int((time.perf_counter() - start_time) * 1000)
             
             # Safety checks
             if not hasattr(response, 'candidates') or not response.candidates:
-                return {
-                    "success": False,
-                    "content": None,
-                    "finish_reason": None,
-                    "usage": None,
-                    "latency_ms": latency_ms,
-                    "model": model,
-                    "error": "No candidates returned from Google API"
-                }
+                return self._err("No candidates returned from Google API", latency_ms, model)
             
             if len(response.candidates) == 0:
-                return {
-                    "success": False,
-                    "content": None,
-                    "finish_reason": None,
-                    "usage": None,
-                    "latency_ms": latency_ms,
-                    "model": model,
-                    "error": "Empty candidates array from Google API"
-                }
+                return self._err("Empty candidates array from Google API", latency_ms, model)
             
             candidate = response.candidates[0]
             
             # Safety check for content
             if not hasattr(candidate, 'content') or not candidate.content:
-                return {
-                    "success": False,
-                    "content": None,
-                    "finish_reason": None,
-                    "usage": None,
-                    "latency_ms": latency_ms,
-                    "model": model,
-                    "error": "No content in candidate from Google API"
-                }
+                return self._err("No content in candidate from Google API", latency_ms, model)
             
             if not hasattr(candidate.content, 'parts') or not candidate.content.parts:
-                return {
-                    "success": False,
-                    "content": None,
-                    "finish_reason": None,
-                    "usage": None,
-                    "latency_ms": latency_ms,
-                    "model": model,
-                    "error": "No parts in content from Google API"
-                }
+                return self._err("No parts in content from Google API", latency_ms, model)
             
             if len(candidate.content.parts) == 0:
-                return {
-                    "success": False,
-                    "content": None,
-                    "finish_reason": None,
-                    "usage": None,
-                    "latency_ms": latency_ms,
-                    "model": model,
-                    "error": "Empty parts array from Google API"
-                }
+                return self._err("Empty parts array from Google API", latency_ms, model)
             
             content = candidate.content.parts[0].text
             
@@ -129,41 +100,51 @@ class GoogleProvider:
             if hasattr(candidate, 'finish_reason'):
                 finish_reason = candidate.finish_reason.name if hasattr(candidate.finish_reason, 'name') else str(candidate.finish_reason)
             
-            return {
-                "success": True,
-                "content": content,
-                "finish_reason": finish_reason,
-                "usage": {
+            return self._ok(
+                content=content,
+                finish_reason=finish_reason,
+                usage={
                     "input_tokens": input_tokens,
                     "output_tokens": output_tokens,
                     "total_tokens": input_tokens + output_tokens
                 },
-                "latency_ms": latency_ms,
-                "model": model,
-                "error": None
-            }
+                latency_ms=latency_ms,
+                model=model
+            )
             
         except Exception as e:
-            latency_ms = int((time.time() - start_time) * 1000)
-            return {
-                "success": False,
-                "content": None,
-                "finish_reason": None,
-                "usage": None,
-                "latency_ms": latency_ms,
-                "model": model,
-                "error": str(e)
-            }
+            latency_ms = int((time.perf_counter() - start_time) * 1000)
+            return self._err(str(e), latency_ms, model)
     
-    def count_tokens(self, text: str) -> int:
+    @property
+    def provider_name(self) -> str:
+        """Return the provider name."""
+        return "google"
+    
+    def count_tokens(self, text: str, model: Optional[str] = None) -> int:
         """
         Estimate token count for Google models.
         Uses rough approximation of 4 characters per token.
         
         Args:
             text: Text to count tokens for
+            model: Model name (unused)
+        
+        Returns:
+            Estimated number of tokens
+        """
+        return len(text) // 4
+    
+    def count_messages_tokens(self, messages: List[Dict[str, str]], model: str) -> int:
+        """
+        Estimate token count for a list of messages.
+        Uses the same 4 characters per token approximation.
+        
+        Args:
+            messages: List of message dicts
+            model: Model name (unused)
         
         Returns:
             Estimated number of tokens
         """
-        return len(text) // 4
\ No newline at end of file
+        return sum(self.count_tokens(msg["content"]) for msg in messages)
\ No newline at end of file
@@ -1,19 +1,131 @@
 """OpenAI provider implementation."""
+import hashlib
 import time
-from typing import List, Dict, Any
-from openai import OpenAI
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import islice
+from typing import List, Dict, Any, Optional, Tuple
+import httpx
+from openai import AsyncOpenAI
+import regex
 import tiktoken
 
 from src.models.database import settings
+from src.providers.base_provider import LLMProvider, get_http_client
+from src.providers.retry import retry
 
+# Minimum number of uncached texts before encoding them in parallel
+BATCH_ENCODE_MIN_VALUES = 16
 
-class OpenAIProvider:
+# Threads tiktoken encodes a batch with (its Rust core releases the GIL)
+BATCH_ENCODE_THREADS = 4
+
+# Texts up to this length are cached by value; longer ones by digest, so
+# the cache doesn't keep large prompts alive
+MAX_CACHED_TEXT_LENGTH = 4096
+
+# Number of long-text token counts kept (least recently used evicted)
+LONG_TEXT_CACHE_SIZE = 512
+
+# (model, BLAKE2b digest of text) -> token count
+_long_text_counts: "OrderedDict[Tuple[str, bytes], int]" = OrderedDict()
+
+
+@lru_cache(maxsize=32)
+def _get_encoding(model: str) -> tiktoken.Encoding:
+    """
+    Get the tiktoken encoding for a model, loading it only once.
+    
+    Args:
+        model: Model name (determines encoding)
+    
+    Returns:
+        tiktoken.Encoding object
+    """
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        # Fallback to cl100k_base (used by gpt-4, gpt-3.5-turbo)
+        return tiktoken.get_encoding("cl100k_base")
+
+
+@lru_cache(maxsize=32)
+def _get_pretokenizer(model: str) -> regex.Pattern:
+    """
+    Get the compiled pattern that splits text into pieces before BPE.
+    
+    Args:
+        model: Model name (determines encoding)
+    
+    Returns:
+        Compiled pre-tokenizer regex of the model's encoding
+    """
+    return regex.compile(_get_encoding(model)._pat_str)
+
+
+@lru_cache(maxsize=4096)
+def _count_cached(model: str, text: str) -> int:
+    """
+    Count tokens in text, memoized for repeated content like system prompts.
+    
+    Args:
+        model: Model name (determines encoding)
+        text: Text to count tokens for
+    
+    Returns:
+        Number of tokens
+    """
+    return len(_get_encoding(model).encode_ordinary(text))
+
+
+def _long_text_key(model: str, text: str) -> Tuple[str, bytes]:
+    """Cache key for a long text: its model and a 128-bit BLAKE2b digest."""
+    return model, hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def _get_long_count(key: Tuple[str, bytes]) -> Optional[int]:
+    """Look up a cached long-text token count, marking it recently used."""
+    count = _long_text_counts.get(key)
+    if count is not None:
+        _long_text_counts.move_to_end(key)
+    return count
+
+
+def _store_long_count(key: Tuple[str, bytes], count: int) -> None:
+    """Cache a long-text token count, evicting the least recently used."""
+    _long_text_counts[key] = count
+    if len(_long_text_counts) > LONG_TEXT_CACHE_SIZE:
+        _long_text_counts.popitem(last=False)
+
+
+class OpenAIProvider(LLMProvider):
     """Handle requests to OpenAI API."""
     
-    def __init__(self):
-        self.client = OpenAI(api_key=settings.openai_api_key)
+    # OpenAI's rate limits comfortably allow more parallel requests
+    MAX_CONCURRENCY = 50
+    
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
+        """
+        Initialize the provider.
+        
+        Args:
+            http_client: HTTP client to send requests with (defaults to the
+                shared pooled client)
+        """
+        super().__init__(api_key=settings.openai_api_key)
+        # Retries are handled by our own retry decorator
+        self.client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            http_client=http_client or get_http_client(),
+            max_retries=0
+        )
         self.base_url = "https://api.openai.com/v1"
     
+    @retry()
+    async def _create_completion(self, **params) -> Any:
+        """Call the chat completions API, retrying transient failures."""
+        return await self.client.chat.completions.create(**params)
+    
     async def send_request(
         self,
         messages: List[Dict[str, str]],
@@ -31,72 +143,57 @@ class OpenAIProvider:
         Returns:
             Dict with response data and metadata
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
             # Call OpenAI API
-            response = self.client.chat.completions.create(
+            response = await self._create_completion(
                 model=model,
                 messages=messages,
                 **kwargs
             )
             
-            latency_ms = int((time.time() - start_time) * 1000)
+            latency_ms = int((time.perf_counter() - start_time) * 1000)
             
             # Safety check: ensure choices exist
             if not response.choices or len(response.choices) == 0:
-                return {
-                    "success": False,
-                    "content": None,
-                    "finish_reason": None,
-                    "usage": None,
-                    "latency_ms": latency_ms,
-                    "model": model,
-                    "error": "No choices returned from OpenAI API"
-                }
+                return self._err("No choices returned from OpenAI API", latency_ms, model)
             
             # Extract response data
             choice = response.choices[0]
             
             # Safety check: ensure usage exists
             if not hasattr(response, 'usage') or response.usage is None:
-                return {
-                    "success": False,
-                    "content": choice.message.content,
-                    "finish_reason": choice.finish_reason,
-                    "usage": None,
-                    "latency_ms": latency_ms,
-                    "model": model,
-                    "error": "No usage data returned from OpenAI API"
-                }
+                return self._err(
+                    "No usage data returned from OpenAI API",
+                    latency_ms,
+                    model,
+                    content=choice.message.content,
+                    finish_reason=choice.finish_reason
+                )
             
             usage = response.usage
             
-            return {
-                "success": True,
-                "content": choice.message.content,
-                "finish_reason": choice.finish_reason,
-                "usage": {
+            return self._ok(
+                content=choice.message.content,
+                finish_reason=choice.finish_reason,
+                usage={
                     "input_tokens": usage.prompt_tokens,
                     "output_tokens": usage.completion_tokens,
                     "total_tokens": usage.total_tokens
                 },
-                "latency_ms": latency_ms,
-                "model": response.model,
-                "error": None
-            }
+                latency_ms=latency_ms,
+                model=response.model
+            )
             
         except Exception as e:
-            latency_ms = int((time.time() - start_time) * 1000)
-            return {
-                "success": False,
-                "content": None,
-                "finish_reason": None,
-                "usage": None,
-                "latency_ms": latency_ms,
-                "model": model,
-                "error": str(e)
-            }
+            latency_ms = int((time.perf_counter() - start_time) * 1000)
+            return self._err(str(e), latency_ms, model)
+    
+    @property
+    def provider_name(self) -> str:
+        """Return the provider name."""
+        return "openai"
     
     def count_tokens(self, text: str, model: str) -> int:
         """
@@ -109,13 +206,82 @@ class OpenAIProvider:
         Returns:
             Number of tokens
         """
-        try:
-            encoding = tiktoken.encoding_for_model(model)
-            return len(encoding.encode(text))
-        except Exception:
-            # Fallback to cl100k_base (used by gpt-4, gpt-3.5-turbo)
-            encoding = tiktoken.get_encoding("cl100k_base")
-            return len(encoding.encode(text))
+        if len(text) <= MAX_CACHED_TEXT_LENGTH:
+            return _count_cached(model, text)
+        
+        # Hashing is far cheaper than BPE-encoding the same text again
+        key = _long_text_key(model, text)
+        count = _get_long_count(key)
+        if count is None:
+            count = len(_get_encoding(model).encode_ordinary(text))
+            _store_long_count(key, count)
+        return count
+    
+    def count_tokens_batch(self, texts: List[str], model: str) -> List[int]:
+        """
+        Count tokens for many texts, encoding cache misses in parallel.
+        
+        Args:
+            texts: Texts to count tokens for
+            model: Model name (determines encoding)
+        
+        Returns:
+            Token count per text, in the same order
+        """
+        counts = []
+        uncached_values = []
+        uncached_keys = []
+        uncached_positions = []
+        for text in texts:
+            if len(text) <= MAX_CACHED_TEXT_LENGTH:
+                counts.append(_count_cached(model, text))
+                continue
+            
+            key = _long_text_key(model, text)
+            count = _get_long_count(key)
+            if count is None:
+                uncached_values.append(text)
+                uncached_keys.append(key)
+                uncached_positions.append(len(counts))
+                count = 0
+            counts.append(count)
+        
+        # encode_ordinary_batch spins up a thread pool, so only use it for many long texts
+        encoding = _get_encoding(model)
+        if len(uncached_values) >= BATCH_ENCODE_MIN_VALUES:
+            encoded = encoding.encode_ordinary_batch(uncached_values, num_threads=BATCH_ENCODE_THREADS)
+        else:
+            encoded = [encoding.encode_ordinary(value) for value in uncached_values]
+        for key, position, tokens in zip(uncached_keys, uncached_positions, encoded):
+            _store_long_count(key, len(tokens))
+            counts[position] = len(tokens)
+        
+        return counts
+    
+    def within_token_limit(self, text: str, limit: int, model: str) -> bool:
+        """
+        Check whether text fits in a token budget without counting all of it.
+        
+        BPE never merges across pre-tokenizer pieces, so every piece is at
+        least one token: finding limit + 1 pieces settles it without
+        encoding anything, and otherwise the text is short enough to encode.
+        
+        Args:
+            text: Text to check
+            limit: Maximum number of tokens allowed
+            model: Model name (determines encoding)
+        
+        Returns:
+            True if text encodes to at most `limit` tokens
+        """
+        # A token covers at least one byte and a character at most four
+        if len(text) * 4 <= limit:
+            return True
+        
+        pieces = sum(1 for _ in islice(_get_pretokenizer(model).finditer(text), limit + 1))
+        if pieces > limit:
+            return False
+        return self.count_tokens(text, model) <= limit
     
     def count_messages_tokens(self, messages: List[Dict[str, str]], model: str) -> int:
         """
@@ -129,22 +295,19 @@ class OpenAIProvider:
         Returns:
             Total token count
         """
-        try:
-            encoding = tiktoken.encoding_for_model(model)
-        except Exception:
-            encoding = tiktoken.get_encoding("cl100k_base")
-        
         tokens_per_message = 3  # Every message follows <|start|>{role/name}\n{content}<|end|>\n
         tokens_per_name = 1  # If there's a name, the role is omitted
         
+        values = []
         num_tokens = 0
         for message in messages:
             num_tokens += tokens_per_message
             for key, value in message.items():
-                num_tokens += len(encoding.encode(value))
+                values.append(value)
                 if key == "name":
                     num_tokens += tokens_per_name
         
+        num_tokens += sum(self.count_tokens_batch(values, model))
         num_tokens += 3  # Every reply is primed with <|start|>assistant<|message|>
         
         return num_tokens
\ No newline at end of file
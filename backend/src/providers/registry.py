@@ -0,0 +1,73 @@
+"""Shared provider instances, created once per process."""
+import threading
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from src.models.schemas import Provider
+from src.providers.base_provider import LLMProvider
+from src.providers.openai_provider import OpenAIProvider
+from src.providers.anthropic_provider import AnthropicProvider
+from src.providers.deepseek_provider import DeepSeekProvider
+from src.providers.google_provider import GoogleProvider
+
+_PROVIDERS: Optional[Dict[str, LLMProvider]] = None
+_init_lock = threading.Lock()
+
+
+def get_providers() -> Dict[str, LLMProvider]:
+    """
+    Get the shared provider instances, keyed by provider name.
+    
+    Providers hold pooled HTTP clients, so they're built once and reused
+    by every request instead of being reconstructed per service.
+    
+    Returns:
+        Dict mapping provider name (e.g., 'openai') to provider instance
+    """
+    global _PROVIDERS
+    if _PROVIDERS is None:
+        with _init_lock:
+            if _PROVIDERS is None:
+                _PROVIDERS = {
+                    'openai': OpenAIProvider(),
+                    'anthropic': AnthropicProvider(),
+                    'deepseek': DeepSeekProvider(),
+                    'google': GoogleProvider()
+                }
+    return _PROVIDERS
+
+
+def get_provider(name: str) -> Optional[LLMProvider]:
+    """
+    Get the shared provider instance for a provider name.
+    
+    Args:
+        name: Provider name (e.g., 'openai', 'anthropic')
+    
+    Returns:
+        Provider instance or None if the provider isn't supported
+    """
+    return get_providers().get(name)
+
+
+def get_providers_by_id(db: Session) -> Dict[int, LLMProvider]:
+    """
+    Get the shared provider instances, keyed by providers.id.
+    
+    Provider IDs are resolved from the providers table with one small
+    query, so callers can look providers up by a model's provider_id
+    without touching the (possibly lazy-loaded) provider relationship.
+    
+    Args:
+        db: Database session
+    
+    Returns:
+        Dict mapping provider ID to provider instance (supported providers only)
+    """
+    providers = get_providers()
+    return {
+        provider_id: providers[name]
+        for provider_id, name in db.query(Provider.id, Provider.name).all()
+        if name in providers
+    }
@@ -0,0 +1,200 @@
+"""Retry helpers for transient provider errors."""
+import asyncio
+import functools
+import random
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+
+import anthropic
+import httpx
+import openai
+from google.api_core import exceptions as google_exceptions
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# HTTP status codes worth retrying (rate limits and upstream hiccups)
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Connection-level failures (resets, timeouts) that are safe to retry
+CONNECTION_ERRORS = (
+    httpx.TransportError,
+    openai.APIConnectionError,
+    anthropic.APIConnectionError,
+)
+
+# Upper bound on any single wait, including server-provided Retry-After
+MAX_RETRY_DELAY_SECONDS = 30
+
+# Concurrency slot (semaphore) held by the current task's provider call, if
+# any; released while waiting to retry so backoff doesn't block other calls
+held_slot: ContextVar[Optional[asyncio.Semaphore]] = ContextVar("held_slot", default=None)
+
+
+class RetryBudget:
+    """
+    Token bucket limiting how many retries a provider may make.
+
+    Each retry spends one token; tokens refill at a steady rate up to
+    `burst`. When a provider is failing across the board (e.g. a 429
+    storm), retries stop once the bucket is empty instead of multiplying
+    the load on it.
+    """
+
+    def __init__(self, burst: int, per_second: float):
+        """
+        Initialize a full bucket.
+
+        Args:
+            burst: Most retries allowed back to back
+            per_second: Rate at which retries are earned back
+        """
+        self.burst = burst
+        self.per_second = per_second
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def try_acquire(self) -> bool:
+        """
+        Spend one token if available.
+
+        Returns:
+            True if a retry is allowed
+        """
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.per_second)
+        self._updated = now
+
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+def default_backoff(attempt: int) -> float:
+    """
+    Exponential backoff with jitter.
+
+    Args:
+        attempt: Zero-based number of the attempt that just failed
+
+    Returns:
+        Delay in seconds (1s, 2s, 4s... capped at 30s, plus up to 1s jitter)
+    """
+    return min(2 ** attempt, MAX_RETRY_DELAY_SECONDS) + random.random()
+
+
+def _get_status_code(error: Exception) -> Optional[int]:
+    """Extract the HTTP status code from a provider exception, if any."""
+    # Google API errors carry the HTTP status as `code`
+    if isinstance(error, google_exceptions.GoogleAPICallError):
+        return error.code if isinstance(error.code, int) else None
+
+    # OpenAI/Anthropic SDK errors expose `status_code` directly
+    status_code = getattr(error, "status_code", None)
+    if isinstance(status_code, int):
+        return status_code
+
+    # httpx.HTTPStatusError keeps it on the response
+    response = getattr(error, "response", None)
+    status_code = getattr(response, "status_code", None)
+    return status_code if isinstance(status_code, int) else None
+
+
+def _get_retry_after(error: Exception) -> Optional[float]:
+    """Read a Retry-After header (in seconds) from a provider exception."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    try:
+        value = headers.get("retry-after")
+    except Exception:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        # HTTP-date form isn't used by our providers; fall back to backoff
+        return None
+
+
+def is_transient_error(error: Exception) -> bool:
+    """
+    Check whether an error is worth retrying.
+
+    Args:
+        error: Exception raised by a provider SDK call
+
+    Returns:
+        True for rate limits, 5xx responses and connection failures
+    """
+    if isinstance(error, CONNECTION_ERRORS):
+        return True
+    return _get_status_code(error) in RETRYABLE_STATUS_CODES
+
+
+def retry(
+    max_attempts: int = 3,
+    backoff: Callable[[int], float] = default_backoff
+) -> Callable:
+    """
+    Retry an async provider call on transient errors.
+
+    Honors the server's Retry-After header when present, otherwise
+    waits according to `backoff`. Non-transient errors are raised
+    immediately, as is the last error once attempts are exhausted or
+    the provider's retry budget (`_retry_budget` on the instance the
+    method is bound to) is spent. A concurrency slot held through
+    `held_slot` is given up while waiting.
+
+    Args:
+        max_attempts: Total number of attempts (including the first)
+        backoff: Function mapping the failed attempt number to a delay
+
+    Returns:
+        Decorator for async functions
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs) -> Any:
+            for attempt in range(max_attempts):
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as e:
+                    if attempt == max_attempts - 1 or not is_transient_error(e):
+                        raise
+
+                    budget = getattr(args[0], "_retry_budget", None) if args else None
+                    if budget is not None and not budget.try_acquire():
+                        logger.warning(
+                            f"{func.__qualname__} failed with transient error, "
+                            f"retry budget exhausted: {e}"
+                        )
+                        raise
+
+                    delay = _get_retry_after(e)
+                    if delay is None:
+                        delay = backoff(attempt)
+                    delay = min(delay, MAX_RETRY_DELAY_SECONDS)
+
+                    logger.warning(
+                        f"{func.__qualname__} failed with transient error "
+                        f"(attempt {attempt + 1}/{max_attempts}), "
+                        f"retrying in {delay:.1f}s: {e}"
+                    )
+                    slot = held_slot.get()
+                    if slot is None:
+                        await asyncio.sleep(delay)
+                        continue
+
+                    slot.release()
+                    try:
+                        await asyncio.sleep(delay)
+                    finally:
+                        await slot.acquire()
+        return wrapper
+    return decorator
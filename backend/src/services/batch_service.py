@@ -1,16 +1,18 @@
 """Batch processing service for concurrent requests."""
 import asyncio
+import time
 import uuid
-from datetime import datetime
-from typing import List, Dict, Any
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+import orjson
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from src.models.schemas import Model, Request
-from src.providers.openai_provider import OpenAIProvider
-from src.providers.anthropic_provider import AnthropicProvider
-from src.providers.deepseek_provider import DeepSeekProvider
-from src.providers.google_provider import GoogleProvider
-from src.services.cost_calculator import calculate_cost
+from src.providers.registry import get_providers
+from src.services.budget_service import BudgetService
+from src.services.cache_service import CacheService
+from src.services.cost_calculator import cost_from_rates
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -21,12 +23,8 @@ class BatchService:
     
     def __init__(self, db: Session):
         self.db = db
-        self.providers = {
-            'openai': OpenAIProvider(),
-            'anthropic': AnthropicProvider(),
-            'deepseek': DeepSeekProvider(),
-            'google': GoogleProvider()
-        }
+        self.cache_service = CacheService()
+        self.providers = get_providers()
     
     async def _process_single_request(
         self,
@@ -37,10 +35,17 @@ class BatchService:
         batch_id: uuid.UUID,
         request_index: int,
         request_id: str
-    ) -> Dict[str, Any]:
+    ) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
         """
         Process a single request in the batch.
         
+        The database row is returned as plain column values; the caller
+        inserts all rows in one statement once the batch finishes. Requests identical
+        to one already in flight share its response; like cache hits, they are
+        free and get no requests row of their own. A failed provider call is
+        raised rather than shared, so every request waiting on it is logged
+        as an error.
+        
         Args:
             model: Model database object
             messages: List of message dicts
@@ -51,10 +56,13 @@ class BatchService:
             request_id: User-provided or generated ID
         
         Returns:
-            Dict with result information
+            Tuple of (result information dict, requests row values or None)
         """
         start_time = datetime.utcnow()
+        start_ns = time.perf_counter_ns()
         db_request_id = uuid.uuid4()
+        # Stored as JSON so logged prompts can be parsed (and queried) later
+        prompt_text = orjson.dumps(messages).decode("utf-8")
         
         try:
             # Get provider
@@ -62,16 +70,31 @@ class BatchService:
             if not provider:
                 raise ValueError(f"Provider {model.provider.name} not found")
             
-            # Send request
-            result = await provider.send_request(
-                messages=messages,
-                model=model.model_id,
-                **request_params
+            async def send() -> Dict[str, Any]:
+                result = await provider.send_request_bounded(
+                    messages=messages,
+                    model=model.model_id,
+                    **request_params
+                )
+                if not result['success']:
+                    raise RuntimeError(result['error'])
+                return result
+            
+            # Send request (waits for a free slot under the provider's limit),
+            # reusing the response of an identical request already in flight
+            result, shared = await self.cache_service.deduplicate(
+                messages,
+                model.model_id,
+                CacheService.cache_temperature(request_params.get('temperature')),
+                request_params.get('max_tokens'),
+                send
             )
+            if shared:
+                return self._cached_result(result, request_index, request_id), None
             
-            # Calculate metrics
-            end_time = datetime.utcnow()
-            latency_ms = int((end_time - start_time).total_seconds() * 1000)
+            # Use the provider's own latency (excludes time spent waiting for a slot)
+            latency_ms = result.get('latency_ms', 0)
+            end_time = start_time + timedelta(milliseconds=latency_ms)
             
             # Extract token usage
             usage = result.get('usage')
@@ -85,23 +108,22 @@ class BatchService:
                 total_tokens = 0
             
             # Calculate costs
-            cost_info = calculate_cost(
-                input_tokens=input_tokens,
-                output_tokens=output_tokens,
-                input_price_per_1m=model.input_price_per_1m_tokens,
-                output_price_per_1m=model.output_price_per_1m_tokens
+            input_cost, output_cost, total_cost = cost_from_rates(
+                input_tokens,
+                output_tokens,
+                model.input_price_per_token,
+                model.output_price_per_token
             )
-            input_cost = cost_info['input_cost_usd']
-            output_cost = cost_info['output_cost_usd']
-            total_cost = cost_info['total_cost_usd']
             
-            # Log to database
-            db_request = Request(
+            # Row values for the requests table
+            request_row = dict(
                 id=db_request_id,
                 user_id=user_id,
                 model_id=model.id,
                 provider_id=model.provider_id,
-                prompt_text=str(messages),
+                model_slug=model.model_id,
+                provider_slug=model.provider.name,
+                prompt_text=prompt_text,
                 response_text=result.get('content'),
                 input_tokens=input_tokens,
                 output_tokens=output_tokens,
@@ -111,10 +133,10 @@ class BatchService:
                 total_cost_usd=total_cost,
                 latency_ms=latency_ms,
                 status='success',
+                error_message=None,
                 created_at=start_time,
                 completed_at=end_time
             )
-            self.db.add(db_request)
             
             logger.debug(f"Batch request {request_index + 1} succeeded ({latency_ms}ms)")
             
@@ -133,19 +155,21 @@ class BatchService:
                 },
                 'status': 'success',
                 'error_message': None
-            }
+            }, request_row
             
         except Exception as e:
             # Log error
-            end_time = datetime.utcnow()
-            latency_ms = int((end_time - start_time).total_seconds() * 1000)
+            latency_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+            end_time = start_time + timedelta(milliseconds=latency_ms)
             
-            db_request = Request(
+            request_row = dict(
                 id=db_request_id,
                 user_id=user_id,
                 model_id=model.id,
                 provider_id=model.provider_id,
-                prompt_text=str(messages),
+                model_slug=model.model_id,
+                provider_slug=model.provider.name,
+                prompt_text=prompt_text,
                 response_text=None,
                 input_tokens=0,
                 output_tokens=0,
@@ -159,7 +183,6 @@ class BatchService:
                 created_at=start_time,
                 completed_at=end_time
             )
-            self.db.add(db_request)
             
             logger.error(f"Batch request {request_index + 1} failed: {str(e)}")
             
@@ -178,7 +201,45 @@ class BatchService:
                 },
                 'status': 'error',
                 'error_message': str(e)
-            }
+            }, request_row
+    
+    @staticmethod
+    def _cached_result(
+        cached_response: Dict[str, Any],
+        request_index: int,
+        request_id: str
+    ) -> Dict[str, Any]:
+        """
+        Build a batch result from a cached provider response.
+        
+        Cached responses cost nothing and aren't logged as new requests.
+        
+        Args:
+            cached_response: Provider result dict stored in the cache
+            request_index: Position in batch
+            request_id: User-provided or generated ID
+        
+        Returns:
+            Dict with result information
+        """
+        usage = cached_response.get('usage') or {}
+        
+        return {
+            'id': request_id,
+            'index': request_index,
+            'content': cached_response.get('content'),
+            'finish_reason': cached_response.get('finish_reason'),
+            'usage': {
+                'prompt_tokens': usage.get('input_tokens', 0),
+                'completion_tokens': usage.get('output_tokens', 0),
+                'total_tokens': usage.get('total_tokens', 0),
+                'input_cost_usd': 0.0,  # Cached = free!
+                'output_cost_usd': 0.0,
+                'total_cost_usd': 0.0
+            },
+            'status': 'success',
+            'error_message': None
+        }
     
     async def process_batch(
         self,
@@ -201,6 +262,7 @@ class BatchService:
         """
         batch_id = uuid.uuid4()
         start_time = datetime.utcnow()
+        start_ns = time.perf_counter_ns()
         
         # Get model
         model = self.db.query(Model).filter(
@@ -215,12 +277,29 @@ class BatchService:
             f"Starting batch {batch_id}: {len(requests)} requests using {model.display_name}"
         )
         
-        # Create tasks for all requests
+        # Check the cache for every request in one round trip
+        cached_responses = self.cache_service.get_many([
+            (
+                req['messages'],
+                model.model_id,
+                CacheService.cache_temperature(request_params.get('temperature')),
+                request_params.get('max_tokens')
+            )
+            for req in requests
+        ])
+        
+        # Create tasks for requests that missed the cache
+        results: List[Optional[Dict[str, Any]]] = [None] * len(requests)
         tasks = []
-        for i, req in enumerate(requests):
+        task_indices = []
+        for i, (req, cached_response) in enumerate(zip(requests, cached_responses)):
             # Use user-provided ID or generate one
             req_id = req.get('id', str(uuid.uuid4()))
             
+            if cached_response:
+                results[i] = self._cached_result(cached_response, i, req_id)
+                continue
+            
             task = self._process_single_request(
                 model=model,
                 messages=req['messages'],
@@ -231,19 +310,33 @@ class BatchService:
                 request_id=req_id
             )
             tasks.append(task)
+            task_indices.append(i)
         
-        # Execute all requests concurrently
-        results = await asyncio.gather(*tasks)
+        # Execute all remaining requests concurrently
+        outcomes = await asyncio.gather(*tasks)
+        for i, (result, _) in zip(task_indices, outcomes):
+            results[i] = result
         
         # Calculate aggregate metrics
-        end_time = datetime.utcnow()
-        total_latency_ms = int((end_time - start_time).total_seconds() * 1000)
+        total_latency_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+        
+        # Aggregate in a single pass over the results
+        successful = 0
+        total_cost = 0.0
+        for r in results:
+            if r['status'] == 'success':
+                successful += 1
+            total_cost += r['usage']['total_cost_usd']
+        failed = len(results) - successful
         
-        successful = sum(1 for r in results if r['status'] == 'success')
-        failed = sum(1 for r in results if r['status'] == 'error')
-        total_cost = sum(r['usage']['total_cost_usd'] for r in results)
+        # Insert all request rows in one statement and commit
+        request_rows = [row for _, row in outcomes if row is not None]
+        if request_rows:
+            self.db.execute(insert(Request), request_rows)
         
-        # Commit all database changes
+        # Charge the user once for the whole batch rather than per request
+        if total_cost > 0:
+            BudgetService(self.db).update_spending(user_id, total_cost)
         self.db.commit()
         
         logger.info(
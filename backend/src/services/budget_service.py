@@ -1,5 +1,6 @@
 """Budget enforcement service."""
 from typing import Optional, Dict
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from src.models.schemas import User
@@ -65,7 +66,11 @@ class BudgetService:
         Returns:
             Dict with approval status and details
         """
-        user = self.db.query(User).filter(User.id == user_id).first()
+        # Only the two budget columns are needed, not the full user row
+        user = self.db.query(
+            User.total_spent_usd,
+            User.spending_limit_usd
+        ).filter(User.id == user_id).first()
         
         if not user:
             return {
@@ -110,15 +115,18 @@ class BudgetService:
         """
         Update user's total spending after a request.
         
+        The increment happens in a single UPDATE so concurrent requests
+        can't overwrite each other's spending (no read-modify-write).
+        
         Args:
             user_id: User UUID
             cost: Actual cost in USD
         """
-        user = self.db.query(User).filter(User.id == user_id).first()
-        
-        if user:
-            user.total_spent_usd = (user.total_spent_usd or 0.0) + cost
-            self.db.commit()
+        self.db.query(User).filter(User.id == user_id).update(
+            {User.total_spent_usd: func.coalesce(User.total_spent_usd, 0.0) + cost},
+            synchronize_session=False
+        )
+        self.db.commit()
     
     def set_spending_limit(self, user_id, limit_usd: Optional[float]) -> None:
         """
@@ -128,11 +136,12 @@ class BudgetService:
             user_id: User UUID
             limit_usd: Spending limit in USD (None = unlimited)
         """
-        user = self.db.query(User).filter(User.id == user_id).first()
-        
-        if user:
-            user.spending_limit_usd = limit_usd
-            self.db.commit()
+        # Update in place; no need to load the user to check it exists
+        self.db.query(User).filter(User.id == user_id).update(
+            {User.spending_limit_usd: limit_usd},
+            synchronize_session=False
+        )
+        self.db.commit()
     
     def reset_spending(self, user_id) -> None:
         """
@@ -141,8 +150,8 @@ class BudgetService:
         Args:
             user_id: User UUID
         """
-        user = self.db.query(User).filter(User.id == user_id).first()
-        
-        if user:
-            user.total_spent_usd = 0.0
-            self.db.commit()
\ No newline at end of file
+        self.db.query(User).filter(User.id == user_id).update(
+            {User.total_spent_usd: 0.0},
+            synchronize_session=False
+        )
+        self.db.commit()
\ No newline at end of file
@@ -1,7 +1,8 @@
 """Response caching service using Redis."""
-import json
+import asyncio
 import hashlib
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable
+import orjson
 import redis
 from datetime import timedelta
 
@@ -11,6 +12,21 @@ from src.utils.logger import setup_logger
 logger = setup_logger(__name__)
 
 
+# Key pattern for all cached responses
+CACHE_KEY_PATTERN = "llm_cache:*"
+
+# Cached /v1/analytics/models response; deleted whenever models are seeded
+MODELS_CACHE_KEY = "analytics_models"
+
+# Keys fetched per SCAN call / deleted per DEL command
+SCAN_BATCH_SIZE = 1000
+DELETE_BATCH_SIZE = 500
+
+# Provider calls currently in flight in this process, keyed by cache key.
+# Shared across CacheService instances so concurrent requests can join them.
+_inflight: Dict[str, asyncio.Future] = {}
+
+
 class CacheService:
     """Handle response caching with Redis."""
     
@@ -21,15 +37,22 @@ class CacheService:
         'tier-3': 1800,   # 30 minutes for cheap models (Haiku, DeepSeek)
     }
     
+    # Temperature used for cache keys when a request doesn't set one
+    DEFAULT_TEMPERATURE = 0.7
+    
     def __init__(self):
         """Initialize Redis connection."""
         settings = get_settings()
+        # Payloads are orjson bytes, so skip decoding responses to str
         self.redis_client = redis.from_url(
             settings.redis_url,
-            decode_responses=True
+            decode_responses=False
         )
         self.enabled = True
         
+        # Resolved once so set() doesn't look it up on every miss
+        self._default_ttl = self.DEFAULT_TTL.get('tier-2', 3600)
+        
         # Test connection
         try:
             self.redis_client.ping()
@@ -38,6 +61,22 @@ class CacheService:
             logger.warning(f"Redis connection failed: {e}. Caching disabled.")
             self.enabled = False
     
+    @classmethod
+    def cache_temperature(cls, temperature: Optional[float]) -> float:
+        """
+        Temperature to key a cached response on.
+        
+        Every caller must use this so that chat and batch requests share
+        keys; an explicit 0 is kept rather than treated as unset.
+        
+        Args:
+            temperature: Temperature from the request, or None if not set
+        
+        Returns:
+            The request's temperature, or DEFAULT_TEMPERATURE
+        """
+        return temperature if temperature is not None else cls.DEFAULT_TEMPERATURE
+    
     def _generate_cache_key(
         self,
         messages: list,
@@ -48,7 +87,7 @@ class CacheService:
         """
         Generate a unique cache key for a request.
         
-        Uses MD5 hash of messages + model + parameters.
+        Uses a 128-bit BLAKE2b hash of messages + model + parameters.
         """
         # Create a string representation of the request
         cache_input = {
@@ -59,8 +98,8 @@ class CacheService:
         }
         
         # Convert to JSON and hash
-        cache_str = json.dumps(cache_input, sort_keys=True)
-        cache_hash = hashlib.md5(cache_str.encode()).hexdigest()
+        cache_bytes = orjson.dumps(cache_input, option=orjson.OPT_SORT_KEYS)
+        cache_hash = hashlib.blake2b(cache_bytes, digest_size=16).hexdigest()
         
         # Prefix with namespace
         return f"llm_cache:{model_id}:{cache_hash}"
@@ -87,7 +126,7 @@ class CacheService:
             
             if cached_data:
                 logger.info(f"Cache HIT for {model_id}")
-                return json.loads(cached_data)
+                return orjson.loads(cached_data)
             else:
                 logger.debug(f"Cache MISS for {model_id}")
                 return None
@@ -96,6 +135,85 @@ class CacheService:
             logger.error(f"Cache get error: {e}")
             return None
     
+    def get_many(
+        self,
+        items: List[Tuple[list, str, float, Optional[int]]]
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Get cached responses for several requests in one round trip.
+        
+        Args:
+            items: List of (messages, model_id, temperature, max_tokens) tuples
+        
+        Returns:
+            List of cached response dicts (or None for misses), in input order
+        """
+        if not self.enabled or not items:
+            return [None] * len(items)
+        
+        try:
+            keys = [self._generate_cache_key(*item) for item in items]
+            cached_values = self.redis_client.mget(keys)
+            
+            responses = [
+                orjson.loads(cached_data) if cached_data else None
+                for cached_data in cached_values
+            ]
+            
+            hits = sum(1 for response in responses if response is not None)
+            logger.info(f"Cache lookup for {len(items)} requests: {hits} hits")
+            return responses
+            
+        except Exception as e:
+            logger.error(f"Cache get_many error: {e}")
+            return [None] * len(items)
+    
+    async def deduplicate(
+        self,
+        messages: list,
+        model_id: str,
+        temperature: float,
+        max_tokens: Optional[int],
+        fetch: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Collapse concurrent identical requests into a single provider call.
+        
+        The first caller for a cache key runs `fetch`; identical requests
+        that arrive while it's in flight wait for and share its result.
+        No lock is needed since the check-and-insert never awaits.
+        
+        Args:
+            messages: Request messages
+            model_id: Model identifier
+            temperature: Temperature parameter
+            max_tokens: Max tokens parameter
+            fetch: Coroutine function that sends the request to the provider
+        
+        Returns:
+            Tuple of (provider result, True if the result was shared)
+        """
+        cache_key = self._generate_cache_key(messages, model_id, temperature, max_tokens)
+        
+        future = _inflight.get(cache_key)
+        if future is not None:
+            logger.debug(f"Joining in-flight request for {model_id}")
+            return await asyncio.shield(future), True
+        
+        future = asyncio.get_running_loop().create_future()
+        _inflight[cache_key] = future
+        try:
+            result = await fetch()
+            future.set_result(result)
+            return result, False
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unjoined failure isn't logged as unhandled
+            future.exception()
+            raise
+        finally:
+            del _inflight[cache_key]
+    
     def set(
         self,
         messages: list,
@@ -103,7 +221,8 @@ class CacheService:
         response: Dict[str, Any],
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
-        ttl_seconds: Optional[int] = None
+        ttl_seconds: Optional[int] = None,
+        tier: Optional[str] = None
     ) -> bool:
         """
         Cache a response.
@@ -114,7 +233,8 @@ class CacheService:
             response: Response to cache
             temperature: Temperature parameter
             max_tokens: Max tokens parameter
-            ttl_seconds: Time-to-live in seconds (optional)
+            ttl_seconds: Time-to-live in seconds (optional, overrides tier)
+            tier: Model tier ('tier-1', 'tier-2', 'tier-3') used to pick a default TTL
         
         Returns:
             True if cached successfully, False otherwise
@@ -125,15 +245,15 @@ class CacheService:
         try:
             cache_key = self._generate_cache_key(messages, model_id, temperature, max_tokens)
             
-            # Use default TTL if not specified
+            # Use the tier's TTL if not specified, falling back to mid-tier
             if ttl_seconds is None:
-                ttl_seconds = self.DEFAULT_TTL['tier-2']  # Default to mid-tier
+                ttl_seconds = self.DEFAULT_TTL.get(tier, self._default_ttl)
             
             # Store in Redis with expiration
             self.redis_client.setex(
                 cache_key,
                 ttl_seconds,
-                json.dumps(response)
+                orjson.dumps(response)
             )
             
             logger.info(f"Cached response for {model_id} (TTL: {ttl_seconds}s)")
@@ -143,6 +263,67 @@ class CacheService:
             logger.error(f"Cache set error: {e}")
             return False
     
+    def get_json(self, key: str) -> Optional[Any]:
+        """
+        Get a cached JSON value stored under an explicit key.
+        
+        Args:
+            key: Full Redis key
+        
+        Returns:
+            Decoded value or None if not found
+        """
+        if not self.enabled:
+            return None
+        
+        try:
+            cached_data = self.redis_client.get(key)
+            return orjson.loads(cached_data) if cached_data else None
+        except Exception as e:
+            logger.error(f"Cache get_json error: {e}")
+            return None
+    
+    def set_json(self, key: str, value: Any, ttl_seconds: int) -> bool:
+        """
+        Cache a JSON-serializable value under an explicit key.
+        
+        Args:
+            key: Full Redis key
+            value: Value to cache
+            ttl_seconds: Time-to-live in seconds
+        
+        Returns:
+            True if cached successfully, False otherwise
+        """
+        if not self.enabled:
+            return False
+        
+        try:
+            self.redis_client.setex(key, ttl_seconds, orjson.dumps(value))
+            return True
+        except Exception as e:
+            logger.error(f"Cache set_json error: {e}")
+            return False
+    
+    def delete(self, key: str) -> bool:
+        """
+        Remove a value stored under an explicit key.
+        
+        Args:
+            key: Full Redis key
+        
+        Returns:
+            True if a value was removed, False otherwise
+        """
+        if not self.enabled:
+            return False
+        
+        try:
+            return bool(self.redis_client.delete(key))
+        except Exception as e:
+            logger.error(f"Cache delete error: {e}")
+            return False
+    
     def clear_all(self) -> int:
         """
         Clear all cached responses.
@@ -154,12 +335,20 @@ class CacheService:
             return 0
         
         try:
-            keys = self.redis_client.keys("llm_cache:*")
-            if keys:
-                count = self.redis_client.delete(*keys)
+            # SCAN instead of KEYS so Redis isn't blocked on a large keyspace
+            count = 0
+            batch = []
+            for key in self.redis_client.scan_iter(match=CACHE_KEY_PATTERN, count=SCAN_BATCH_SIZE):
+                batch.append(key)
+                if len(batch) >= DELETE_BATCH_SIZE:
+                    count += self.redis_client.delete(*batch)
+                    batch = []
+            if batch:
+                count += self.redis_client.delete(*batch)
+            
+            if count:
                 logger.info(f"Cleared {count} cached responses")
-                return count
-            return 0
+            return count
         except Exception as e:
             logger.error(f"Cache clear error: {e}")
             return 0
@@ -171,7 +360,9 @@ class CacheService:
         
         try:
             info = self.redis_client.info()
-            keys_count = len(self.redis_client.keys("llm_cache:*"))
+            keys_count = sum(
+                1 for _ in self.redis_client.scan_iter(match=CACHE_KEY_PATTERN, count=SCAN_BATCH_SIZE)
+            )
             
             return {
                 "enabled": True,
@@ -1,16 +1,17 @@
 """Service for handling A/B comparisons across multiple models."""
 import asyncio
+import time
 import uuid
-from datetime import datetime
-from typing import List, Dict, Any
-from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Tuple
+import orjson
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, joinedload
 
 from src.models.schemas import Comparison, Request, Model
-from src.providers.openai_provider import OpenAIProvider
-from src.providers.anthropic_provider import AnthropicProvider
-from src.providers.deepseek_provider import DeepSeekProvider
-from src.providers.google_provider import GoogleProvider
-from src.services.cost_calculator import calculate_cost
+from src.providers.registry import get_providers_by_id
+from src.services.budget_service import BudgetService
+from src.services.cost_calculator import cost_from_rates
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -19,14 +20,13 @@ logger = setup_logger(__name__)
 class ComparisonService:
     """Handle A/B comparison requests across multiple models."""
     
+    # Give up on a model that hasn't answered (including retries) by then,
+    # so one stuck provider can't hold up the whole comparison
+    REQUEST_TIMEOUT_SECONDS = 120
+    
     def __init__(self, db: Session):
         self.db = db
-        self.providers = {
-            'openai': OpenAIProvider(),
-            'anthropic': AnthropicProvider(),
-            'deepseek': DeepSeekProvider(),
-            'google': GoogleProvider()
-        }
+        self.providers_by_id = get_providers_by_id(db)
     
     async def _send_to_model(
         self,
@@ -34,10 +34,14 @@ class ComparisonService:
         messages: List[Dict[str, str]],
         request_params: Dict[str, Any],
         user_id: uuid.UUID,
-        comparison_id: uuid.UUID
-    ) -> Dict[str, Any]:
+        comparison_id: uuid.UUID,
+        prompt_text: str
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
         """
-        Send request to a single model and log the result.
+        Send request to a single model and build its log row.
+        
+        The row is returned as plain column values; the caller inserts
+        all rows in one statement once every model has responded.
         
         Args:
             model: Model database object
@@ -45,29 +49,39 @@ class ComparisonService:
             request_params: Additional parameters
             user_id: User ID
             comparison_id: Comparison ID to link this request
+            prompt_text: Serialized messages, shared by every model's log row
         
         Returns:
-            Dict with result information
+            Tuple of (result information dict, requests row values)
         """
         request_id = uuid.uuid4()
         start_time = datetime.utcnow()
+        start_ns = time.perf_counter_ns()
         
         try:
             # Get provider
-            provider = self.providers.get(model.provider.name)
+            provider = self.providers_by_id.get(model.provider_id)
             if not provider:
                 raise ValueError(f"Provider {model.provider.name} not found")
             
             # Send request
-            result = await provider.send_request(
-                messages=messages,
-                model=model.model_id,
-                **request_params
-            )
+            try:
+                result = await asyncio.wait_for(
+                    provider.send_request(
+                        messages=messages,
+                        model=model.model_id,
+                        **request_params
+                    ),
+                    timeout=self.REQUEST_TIMEOUT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                raise TimeoutError(
+                    f"No response within {self.REQUEST_TIMEOUT_SECONDS}s"
+                )
             
             # Calculate metrics
-            end_time = datetime.utcnow()
-            latency_ms = int((end_time - start_time).total_seconds() * 1000)
+            latency_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+            end_time = start_time + timedelta(milliseconds=latency_ms)
             
             # Extract token usage - providers return input_tokens/output_tokens
             usage = result.get('usage')
@@ -82,24 +96,23 @@ class ComparisonService:
                 total_tokens = 0
             
             # Calculate costs
-            cost_info = calculate_cost(
-                input_tokens=input_tokens,
-                output_tokens=output_tokens,
-                input_price_per_1m=model.input_price_per_1m_tokens,
-                output_price_per_1m=model.output_price_per_1m_tokens
+            input_cost, output_cost, total_cost = cost_from_rates(
+                input_tokens,
+                output_tokens,
+                model.input_price_per_token,
+                model.output_price_per_token
             )
-            input_cost = cost_info['input_cost_usd']
-            output_cost = cost_info['output_cost_usd']
-            total_cost = cost_info['total_cost_usd']
             
-            # Log to database
-            db_request = Request(
+            # Row values for the requests table
+            request_row = dict(
                 id=request_id,
                 user_id=user_id,
                 model_id=model.id,
                 provider_id=model.provider_id,
+                model_slug=model.model_id,
+                provider_slug=model.provider.name,
                 comparison_id=comparison_id,
-                prompt_text=str(messages),
+                prompt_text=prompt_text,
                 response_text=result.get('content'),
                 input_tokens=input_tokens,
                 output_tokens=output_tokens,
@@ -109,12 +122,15 @@ class ComparisonService:
                 total_cost_usd=total_cost,
                 latency_ms=latency_ms,
                 status='success',
+                error_message=None,
                 created_at=start_time,
                 completed_at=end_time
             )
-            self.db.add(db_request)
             
-            logger.info(f"Comparison: {model.model_id} succeeded in {latency_ms}ms, cost ${total_cost:.6f}")
+            logger.info(
+                "Comparison: %s succeeded in %dms, cost $%.6f",
+                model.model_id, latency_ms, total_cost
+            )
             
             return {
                 'model': model.model_id,
@@ -132,20 +148,22 @@ class ComparisonService:
                 'latency_ms': latency_ms,
                 'status': 'success',
                 'error_message': None
-            }
+            }, request_row
             
         except Exception as e:
             # Log error
-            end_time = datetime.utcnow()
-            latency_ms = int((end_time - start_time).total_seconds() * 1000)
+            latency_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+            end_time = start_time + timedelta(milliseconds=latency_ms)
             
-            db_request = Request(
+            request_row = dict(
                 id=request_id,
                 user_id=user_id,
                 model_id=model.id,
                 provider_id=model.provider_id,
+                model_slug=model.model_id,
+                provider_slug=model.provider.name,
                 comparison_id=comparison_id,
-                prompt_text=str(messages),
+                prompt_text=prompt_text,
                 response_text=None,
                 input_tokens=0,
                 output_tokens=0,
@@ -159,27 +177,41 @@ class ComparisonService:
                 created_at=start_time,
                 completed_at=end_time
             )
-            self.db.add(db_request)
             
-            logger.error(f"Comparison: {model.model_id} failed - {str(e)}")
+            logger.error("Comparison: %s failed - %s", model.model_id, e)
             
-            return {
-                'model': model.model_id,
-                'provider': model.provider.name,
-                'content': None,
-                'finish_reason': None,
-                'usage': {
-                    'prompt_tokens': 0,
-                    'completion_tokens': 0,
-                    'total_tokens': 0,
-                    'input_cost_usd': 0.0,
-                    'output_cost_usd': 0.0,
-                    'total_cost_usd': 0.0
-                },
-                'latency_ms': latency_ms,
-                'status': 'error',
-                'error_message': str(e)
-            }
+            return self._error_result(model, str(e), latency_ms), request_row
+    
+    @staticmethod
+    def _error_result(model: Model, error_message: str, latency_ms: int) -> Dict[str, Any]:
+        """
+        Build the result entry for a model that failed.
+        
+        Args:
+            model: Model database object
+            error_message: Error description
+            latency_ms: Time spent before the failure
+        
+        Returns:
+            Dict with result information
+        """
+        return {
+            'model': model.model_id,
+            'provider': model.provider.name,
+            'content': None,
+            'finish_reason': None,
+            'usage': {
+                'prompt_tokens': 0,
+                'completion_tokens': 0,
+                'total_tokens': 0,
+                'input_cost_usd': 0.0,
+                'output_cost_usd': 0.0,
+                'total_cost_usd': 0.0
+            },
+            'latency_ms': latency_ms,
+            'status': 'error',
+            'error_message': error_message
+        }
     
     async def compare_models(
         self,
@@ -202,7 +234,8 @@ class ComparisonService:
         """
         # Create comparison record
         comparison_id = uuid.uuid4()
-        prompt_text = str(messages)
+        created_at = datetime.utcnow()
+        prompt_text = orjson.dumps(messages).decode("utf-8")
         
         comparison = Comparison(
             id=comparison_id,
@@ -210,13 +243,13 @@ class ComparisonService:
             prompt_text=prompt_text,
             models_used=model_ids,
             total_cost_usd=0.0,
-            created_at=datetime.utcnow()
+            created_at=created_at
         )
         self.db.add(comparison)
-        self.db.flush()  # Get the ID without committing
         
         # Get model objects
-        models = self.db.query(Model).filter(
+        # Eager-load providers; results report each model's provider name
+        models = self.db.query(Model).options(joinedload(Model.provider)).filter(
             Model.model_id.in_(model_ids),
             Model.is_active == True
         ).all()
@@ -226,14 +259,32 @@ class ComparisonService:
             missing = set(model_ids) - found_models
             raise ValueError(f"Models not found or inactive: {missing}")
         
-        logger.info(f"Starting comparison {comparison_id} with {len(models)} models")
+        logger.info("Starting comparison %s with %d models", comparison_id, len(models))
         
         # Send requests concurrently
         tasks = [
-            self._send_to_model(model, messages, request_params, user_id, comparison_id)
+            self._send_to_model(
+                model, messages, request_params, user_id, comparison_id, prompt_text
+            )
             for model in models
         ]
-        results = await asyncio.gather(*tasks)
+        # return_exceptions keeps one unexpected failure from discarding
+        # the other models' results
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        results = []
+        request_rows = []
+        for model, outcome in zip(models, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error("Comparison: %s raised unexpectedly - %r", model.model_id, outcome)
+                results.append(self._error_result(model, str(outcome), 0))
+                continue
+            result, request_row = outcome
+            # Request IDs are generated client-side, so the bulk insert
+            # below needs no RETURNING round trip to report them
+            result['request_id'] = str(request_row['id'])
+            results.append(result)
+            request_rows.append(request_row)
         
         # Calculate total cost from all results
         total_cost = 0.0
@@ -244,17 +295,28 @@ class ComparisonService:
         
         comparison.total_cost_usd = total_cost
         
+        # Write the comparison (with its final cost) before the requests
+        # that reference it, then insert all request rows in one statement
+        self.db.flush()
+        if request_rows:
+            self.db.execute(insert(Request), request_rows)
+        
+        # Charge the user once for all models in the comparison
+        if total_cost > 0:
+            BudgetService(self.db).update_spending(user_id, total_cost)
+        
         # Commit everything
         self.db.commit()
         
         logger.info(
-            f"Comparison {comparison_id} complete - "
-            f"Total cost: ${total_cost:.6f}"
+            "Comparison %s complete - Total cost: $%.6f",
+            comparison_id, total_cost
         )
         
         return {
             'comparison_id': str(comparison_id),
             'results': results,
             'total_cost_usd': total_cost,
-            'created_at': comparison.created_at.isoformat()
+            # Local value: reading the attribute after commit would reload the row
+            'created_at': created_at.isoformat()
         }
\ No newline at end of file
@@ -1,5 +1,35 @@
 """Cost calculation service."""
-from typing import Dict
+from typing import Dict, Tuple
+
+# Model prices are quoted per this many tokens
+TOKENS_PER_PRICE_UNIT = 1_000_000
+
+
+def cost_from_rates(
+    input_tokens: int,
+    output_tokens: int,
+    input_price_per_token: float,
+    output_price_per_token: float
+) -> Tuple[float, float, float]:
+    """
+    Calculate cost from per-token rates (see Model.input_price_per_token).
+    
+    Args:
+        input_tokens: Number of input tokens
+        output_tokens: Number of output tokens
+        input_price_per_token: Price per input token (USD)
+        output_price_per_token: Price per output token (USD)
+    
+    Returns:
+        Tuple of (input_cost, output_cost, total_cost) in USD
+    """
+    input_cost = input_tokens * input_price_per_token
+    output_cost = output_tokens * output_price_per_token
+    return (
+        round(input_cost, 8),
+        round(output_cost, 8),
+        round(input_cost + output_cost, 8)
+    )
 
 
 def calculate_cost(
@@ -20,12 +50,15 @@ def calculate_cost(
     Returns:
         Dict with input_cost, output_cost, and total_cost in USD
     """
-    input_cost = (input_tokens / 1_000_000) * input_price_per_1m
-    output_cost = (output_tokens / 1_000_000) * output_price_per_1m
-    total_cost = input_cost + output_cost
+    input_cost, output_cost, total_cost = cost_from_rates(
+        input_tokens,
+        output_tokens,
+        input_price_per_1m / TOKENS_PER_PRICE_UNIT,
+        output_price_per_1m / TOKENS_PER_PRICE_UNIT
+    )
     
     return {
-        "input_cost_usd": round(input_cost, 8),
-        "output_cost_usd": round(output_cost, 8),
-        "total_cost_usd": round(total_cost, 8)
+        "input_cost_usd": input_cost,
+        "output_cost_usd": output_cost,
+        "total_cost_usd": total_cost
     }
\ No newline at end of file
@@ -1,10 +1,60 @@
 """Model selection service for cost optimization."""
-from typing import List, Dict, Optional
+import time
+from functools import lru_cache
+from typing import List, Dict, NamedTuple, Optional, Tuple
 from sqlalchemy.orm import Session
 
 from src.models.schemas import Model, Provider
 from src.services.token_estimator import TokenEstimator
 
+# How long a loaded model catalog is reused before querying again
+CATALOG_TTL_SECONDS = 60
+
+# Hashable form of a message list: one tuple of (field, value) pairs per message
+MessagesKey = Tuple[Tuple[Tuple[str, str], ...], ...]
+
+
+class CatalogModel(NamedTuple):
+    """Detached snapshot of an active model and its provider."""
+    id: int
+    model_id: str
+    display_name: str
+    provider_id: int
+    provider_name: str
+    input_price_per_1m_tokens: float
+    output_price_per_1m_tokens: float
+
+
+# (loaded_at, models) for the full active catalog; None until first loaded
+_catalog_cache: Optional[Tuple[float, List[CatalogModel]]] = None
+
+
+@lru_cache(maxsize=256)
+def _buffered_input_tokens(model_id: str, messages_key: MessagesKey) -> int:
+    """
+    Tokenize a prompt for a model, memoized for repeated prompts.
+    
+    Args:
+        model_id: Model ID for tokenizer selection
+        messages_key: Messages as returned by _messages_key
+    
+    Returns:
+        Buffered input token estimate
+    """
+    messages = [dict(fields) for fields in messages_key]
+    return TokenEstimator().estimate_messages_tokens(messages, model_id)["buffered_tokens"]
+
+
+def _messages_key(messages: List[Dict[str, str]]) -> MessagesKey:
+    """Convert a message list into a hashable cache key."""
+    return tuple(tuple(message.items()) for message in messages)
+
+
+def clear_model_catalog_cache() -> None:
+    """Drop the cached model catalog (e.g., after changing models or prices)."""
+    global _catalog_cache
+    _catalog_cache = None
+
 
 class ModelSelector:
     """Select optimal model based on cost and constraints."""
@@ -19,25 +69,23 @@ class ModelSelector:
         self.db = db
         self.estimator = TokenEstimator()
     
-    def get_cheapest_model(
-        self,
-        messages: List[Dict[str, str]],
-        expected_output_tokens: int = 500,
-        provider_filter: Optional[List[str]] = None,
-        exclude_models: Optional[List[str]] = None
-    ) -> Optional[Dict]:
+    def _load_catalog(self) -> List[CatalogModel]:
         """
-        Find the cheapest model for a given request.
+        Load all active models, reusing a recent result when available.
         
-        Args:
-            messages: List of message dicts
-            expected_output_tokens: Expected response length
-            provider_filter: Optional list of provider names to consider
-            exclude_models: Optional list of model IDs to exclude
+        The catalog rarely changes, so it's cached for CATALOG_TTL_SECONDS
+        instead of querying on every request. One cached copy serves every
+        filter combination.
         
         Returns:
-            Dict with model info and cost estimate, or None if no models available
+            List of CatalogModel snapshots
         """
+        global _catalog_cache
+        now = time.monotonic()
+        
+        if _catalog_cache and now - _catalog_cache[0] < CATALOG_TTL_SECONDS:
+            return _catalog_cache[1]
+        
         # Query active models with their providers
         query = self.db.query(Model, Provider).join(
             Provider, Model.provider_id == Provider.id
@@ -46,45 +94,180 @@ class ModelSelector:
             Provider.is_active == True
         )
         
+        models = [
+            CatalogModel(
+                id=model.id,
+                model_id=model.model_id,
+                display_name=model.display_name,
+                provider_id=provider.id,
+                provider_name=provider.name,
+                input_price_per_1m_tokens=model.input_price_per_1m_tokens,
+                output_price_per_1m_tokens=model.output_price_per_1m_tokens
+            )
+            for model, provider in query.all()
+        ]
+        
+        _catalog_cache = (now, models)
+        return models
+    
+    def _load_models(
+        self,
+        provider_filter: Optional[List[str]] = None,
+        exclude_models: Optional[List[str]] = None
+    ) -> List[CatalogModel]:
+        """
+        Get active models, filtered from the cached catalog.
+        
+        Args:
+            provider_filter: Optional list of provider names to consider
+            exclude_models: Optional list of model IDs to exclude
+        
+        Returns:
+            List of CatalogModel snapshots
+        """
+        models = self._load_catalog()
+        
         # Apply provider filter if specified
         if provider_filter:
-            query = query.filter(Provider.name.in_(provider_filter))
+            providers = set(provider_filter)
+            models = [m for m in models if m.provider_name in providers]
         
         # Apply model exclusion if specified
         if exclude_models:
-            query = query.filter(~Model.model_id.in_(exclude_models))
+            excluded = set(exclude_models)
+            models = [m for m in models if m.model_id not in excluded]
         
-        models = query.all()
+        return models
+    
+    def _estimate_costs(
+        self,
+        models: List[CatalogModel],
+        messages: List[Dict[str, str]],
+        expected_output_tokens: int,
+        fast_estimate: bool = False
+    ) -> Tuple[List[int], List[float]]:
+        """
+        Estimate the cost of a request for each model.
+        
+        Input tokens only depend on the model's encoding, so messages are
+        tokenized once per distinct encoding rather than once per model
+        (and not at all when the same prompt was estimated recently).
+        Only plain floats are produced here; the full cost breakdown is
+        built (see _cost_breakdown) just for the models that are returned.
+        
+        Args:
+            models: List of active models
+            messages: List of message dicts
+            expected_output_tokens: Expected response length
+            fast_estimate: Estimate tokens from byte length instead of tokenizing
+        
+        Returns:
+            Tuple of (buffered input tokens, estimated total cost in USD),
+            each in the same order as models
+        """
+        tokens_by_encoding: Dict[str, int] = {}
+        messages_key = None if fast_estimate else _messages_key(messages)
+        input_tokens_list = []
+        costs = []
+        
+        for model in models:
+            if fast_estimate:
+                encoding_name = "fast"
+            else:
+                encoding_name = self.estimator.get_encoding_name(model.model_id)
+            
+            input_tokens = tokens_by_encoding.get(encoding_name)
+            if input_tokens is None:
+                if fast_estimate:
+                    input_tokens = self.estimator.fast_estimate_messages_tokens(messages)["buffered_tokens"]
+                else:
+                    input_tokens = _buffered_input_tokens(model.model_id, messages_key)
+                tokens_by_encoding[encoding_name] = input_tokens
+            
+            input_tokens_list.append(input_tokens)
+            
+            # Same arithmetic as TokenEstimator.estimate_cost
+            input_cost = (input_tokens / 1_000_000) * model.input_price_per_1m_tokens
+            output_cost = (expected_output_tokens / 1_000_000) * model.output_price_per_1m_tokens
+            costs.append(round(input_cost + output_cost, 8))
+        
+        return input_tokens_list, costs
+    
+    def _cost_breakdown(
+        self,
+        model: CatalogModel,
+        messages: List[Dict[str, str]],
+        input_tokens: int,
+        expected_output_tokens: int
+    ) -> Dict[str, float]:
+        """
+        Build the cost estimate dict for one model.
+        
+        Args:
+            model: Model to describe
+            messages: List of message dicts
+            input_tokens: Buffered input tokens from _estimate_costs
+            expected_output_tokens: Expected response length
+        
+        Returns:
+            Cost estimate dict (see TokenEstimator.estimate_cost)
+        """
+        return self.estimator.estimate_cost(
+            messages=messages,
+            model_id=model.model_id,
+            input_price_per_1m=model.input_price_per_1m_tokens,
+            output_price_per_1m=model.output_price_per_1m_tokens,
+            expected_output_tokens=expected_output_tokens,
+            input_tokens=input_tokens
+        )
+    
+    def get_cheapest_model(
+        self,
+        messages: List[Dict[str, str]],
+        expected_output_tokens: int = 500,
+        provider_filter: Optional[List[str]] = None,
+        exclude_models: Optional[List[str]] = None,
+        fast_estimate: bool = False
+    ) -> Optional[Dict]:
+        """
+        Find the cheapest model for a given request.
+        
+        Args:
+            messages: List of message dicts
+            expected_output_tokens: Expected response length
+            provider_filter: Optional list of provider names to consider
+            exclude_models: Optional list of model IDs to exclude
+            fast_estimate: Estimate tokens from byte length instead of tokenizing;
+                good enough for budget pre-checks, not for reporting costs
+        
+        Returns:
+            Dict with model info and cost estimate, or None if no models available
+        """
+        models = self._load_models(provider_filter, exclude_models)
         
         if not models:
             return None
         
         # Calculate estimated cost for each model
-        model_costs = []
-        
-        for model, provider in models:
-            cost_estimate = self.estimator.estimate_cost(
-                messages=messages,
-                model_id=model.model_id,
-                input_price_per_1m=model.input_price_per_1m_tokens,
-                output_price_per_1m=model.output_price_per_1m_tokens,
-                expected_output_tokens=expected_output_tokens
-            )
-            
-            model_costs.append({
-                "model_id": model.model_id,
-                "model_db_id": model.id,
-                "display_name": model.display_name,
-                "provider_name": provider.name,
-                "provider_id": provider.id,
-                "estimated_cost": cost_estimate["estimated_total_cost_usd"],
-                "cost_breakdown": cost_estimate
-            })
+        input_tokens, costs = self._estimate_costs(
+            models, messages, expected_output_tokens, fast_estimate
+        )
         
-        # Sort by estimated cost (cheapest first)
-        model_costs.sort(key=lambda x: x["estimated_cost"])
+        # Only the cheapest model is needed, so pick it without sorting
+        cheapest = min(range(len(models)), key=costs.__getitem__)
+        model = models[cheapest]
         
-        return model_costs[0] if model_costs else None
+        return {
+            "model_id": model.model_id,
+            "model_db_id": model.id,
+            "display_name": model.display_name,
+            "provider_name": model.provider_name,
+            "provider_id": model.provider_id,
+            "estimated_cost": costs[cheapest],
+            "cost_breakdown": self._cost_breakdown(
+                model, messages, input_tokens[cheapest], expected_output_tokens
+            )
+        }
     
     def get_ranked_models(
         self,
@@ -105,52 +288,39 @@ class ModelSelector:
         Returns:
             List of model dicts sorted by cost (cheapest first)
         """
-        # Query active models
-        query = self.db.query(Model, Provider).join(
-            Provider, Model.provider_id == Provider.id
-        ).filter(
-            Model.is_active == True,
-            Provider.is_active == True
-        )
+        models = self._load_models(provider_filter)
         
-        if provider_filter:
-            query = query.filter(Provider.name.in_(provider_filter))
+        # Calculate costs
+        input_tokens, costs = self._estimate_costs(models, messages, expected_output_tokens)
         
-        models = query.all()
+        # Apply max cost filter and sort by cost on plain floats before
+        # building any result dicts
+        ranked = [
+            i for i in range(len(models))
+            if max_cost is None or costs[i] <= max_cost
+        ]
+        ranked.sort(key=costs.__getitem__)
         
-        # Calculate costs
         model_costs = []
-        
-        for model, provider in models:
-            cost_estimate = self.estimator.estimate_cost(
-                messages=messages,
-                model_id=model.model_id,
-                input_price_per_1m=model.input_price_per_1m_tokens,
-                output_price_per_1m=model.output_price_per_1m_tokens,
-                expected_output_tokens=expected_output_tokens
+        for i in ranked:
+            model = models[i]
+            cost_estimate = self._cost_breakdown(
+                model, messages, input_tokens[i], expected_output_tokens
             )
-            
-            estimated_cost = cost_estimate["estimated_total_cost_usd"]
-            
-            # Apply max cost filter
-            if max_cost is not None and estimated_cost > max_cost:
-                continue
+            estimated_cost = costs[i]
             
             model_costs.append({
                 "model_id": model.model_id,
                 "model_db_id": model.id,
                 "display_name": model.display_name,
-                "provider_name": provider.name,
-                "provider_id": provider.id,
+                "provider_name": model.provider_name,
+                "provider_id": model.provider_id,
                 "estimated_cost": estimated_cost,
                 "cost_breakdown": cost_estimate,
                 "input_price_per_1m": model.input_price_per_1m_tokens,
                 "output_price_per_1m": model.output_price_per_1m_tokens
             })
         
-        # Sort by cost
-        model_costs.sort(key=lambda x: x["estimated_cost"])
-        
         return model_costs
     
     def get_model_comparison(
@@ -1,7 +1,28 @@
 """Token estimation service for cost prediction."""
-from typing import List, Dict
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
 import tiktoken
 
+from src.models.database import settings
+
+# Message fields of the common schema; anything else (e.g. 'name') costs extra
+_SIMPLE_KEYS = frozenset({"role", "content"})
+
+
+@lru_cache(maxsize=1)
+def _get_default_encoding() -> tiktoken.Encoding:
+    """
+    Load the fallback encoding on first use.
+    
+    cl100k_base is used by gpt-4, gpt-3.5-turbo, and most modern models.
+    Loading its BPE ranks is expensive, so it's deferred until an unknown
+    model actually needs it.
+    
+    Returns:
+        tiktoken.Encoding object
+    """
+    return tiktoken.get_encoding("cl100k_base")
+
 
 class TokenEstimator:
     """Estimate token counts before sending requests to providers."""
@@ -9,26 +30,61 @@ class TokenEstimator:
     # Safety buffer to account for estimation inaccuracy
     BUFFER_MULTIPLIER = 1.15  # Add 15% buffer
     
-    def __init__(self):
-        """Initialize with default encoding."""
-        # cl100k_base is used by gpt-4, gpt-3.5-turbo, and most modern models
-        self.default_encoding = tiktoken.get_encoding("cl100k_base")
+    # Minimum number of message fields before tokenizing them in parallel
+    # (encode_ordinary_batch builds a thread pool per call)
+    BATCH_ENCODE_MIN_VALUES = 16
+    
+    # Longest ASCII text approximated without tokenizing when
+    # settings.fast_token_estimate is on
+    SHORT_TEXT_MAX_LENGTH = 64
+    
+    # Encodings resolved so far, shared by all instances (model_id -> encoding)
+    _encoding_cache: Dict[str, tiktoken.Encoding] = {}
+    
+    @property
+    def default_encoding(self) -> tiktoken.Encoding:
+        """Encoding used for models tiktoken doesn't recognize (loaded lazily)."""
+        return _get_default_encoding()
     
     def _get_encoding_for_model(self, model_id: str) -> tiktoken.Encoding:
         """
         Get the appropriate encoding for a model.
         
+        Resolved once per model_id, including the fallback for unknown
+        models, so repeated estimates skip tiktoken's lookup entirely.
+        
         Args:
             model_id: Model identifier (e.g., 'gpt-4o-mini')
         
         Returns:
             tiktoken.Encoding object
         """
+        encoding = self._encoding_cache.get(model_id)
+        if encoding is not None:
+            return encoding
+        
         try:
-            return tiktoken.encoding_for_model(model_id)
+            encoding = tiktoken.encoding_for_model(model_id)
         except KeyError:
             # Model not recognized, use default
-            return self.default_encoding
+            encoding = self.default_encoding
+        
+        self._encoding_cache[model_id] = encoding
+        return encoding
+    
+    def get_encoding_name(self, model_id: str) -> str:
+        """
+        Get the name of the encoding used for a model.
+        
+        Models sharing an encoding produce identical token counts.
+        
+        Args:
+            model_id: Model identifier (e.g., 'gpt-4o-mini')
+        
+        Returns:
+            Encoding name (e.g., 'cl100k_base')
+        """
+        return self._get_encoding_for_model(model_id).name
     
     def estimate_messages_tokens(
         self,
@@ -50,32 +106,162 @@ class TokenEstimator:
         Returns:
             Dict with 'estimated_tokens' and 'buffered_tokens'
         """
-        encoding = self._get_encoding_for_model(model_id)
+        overhead, values = self._split_messages(messages)
+        return self._token_counts(overhead + sum(self._count_values(values, model_id)))
+    
+    def estimate_many(
+        self,
+        conversations: List[List[Dict[str, str]]],
+        model_id: str = "gpt-4o-mini"
+    ) -> List[Dict[str, int]]:
+        """
+        Estimate token counts for several message lists at once.
+        
+        Same counts as calling estimate_messages_tokens on each list, but
+        the fields of every conversation are tokenized in one batch.
+        
+        Args:
+            conversations: List of message lists
+            model_id: Model ID for tokenizer selection
+        
+        Returns:
+            List of dicts with 'estimated_tokens' and 'buffered_tokens',
+            in the same order as conversations
+        """
+        overheads = []
+        value_counts = []
+        values = []
+        for messages in conversations:
+            overhead, message_values = self._split_messages(messages)
+            overheads.append(overhead)
+            value_counts.append(len(message_values))
+            values.extend(message_values)
+        
+        token_counts = self._count_values(values, model_id)
+        
+        results = []
+        start = 0
+        for overhead, count in zip(overheads, value_counts):
+            content_tokens = sum(token_counts[start:start + count])
+            results.append(self._token_counts(overhead + content_tokens))
+            start += count
+        
+        return results
+    
+    @staticmethod
+    def _split_messages(messages: List[Dict[str, str]]) -> Tuple[int, List[str]]:
+        """
+        Split messages into formatting overhead and the fields to tokenize.
+        
+        Args:
+            messages: List of message dicts with 'role' and 'content'
         
+        Returns:
+            Tuple of (overhead tokens, field values to tokenize)
+        """
         # Token overhead per message
         # Format: <|start|>{role/name}\n{content}<|end|>\n
         tokens_per_message = 3
         tokens_per_name = 1
         
-        num_tokens = 0
+        # Every reply is primed with <|start|>assistant<|message|>
+        num_tokens = tokens_per_message * len(messages) + 3
         
-        for message in messages:
-            num_tokens += tokens_per_message
-            
-            for key, value in message.items():
-                num_tokens += len(encoding.encode(value))
-                if key == "name":
-                    num_tokens += tokens_per_name
+        if all(message.keys() <= _SIMPLE_KEYS for message in messages):
+            # Common case: only role/content, no per-field bookkeeping
+            values = [value for message in messages for value in message.values()]
+        else:
+            values = []
+            for message in messages:
+                for key, value in message.items():
+                    values.append(value)
+                    if key == "name":
+                        num_tokens += tokens_per_name
         
-        # Every reply is primed with <|start|>assistant<|message|>
-        num_tokens += 3
+        return num_tokens, values
+    
+    def _count_values(self, values: List[str], model_id: str) -> List[int]:
+        """
+        Count tokens in message fields, in parallel when there are many.
+        
+        With settings.fast_token_estimate on, short ASCII texts are
+        approximated at ~4 characters per token instead of tokenized.
+        
+        Args:
+            values: Field values to count
+            model_id: Model ID for tokenizer selection
+        
+        Returns:
+            Token counts in the same order as values
+        """
+        if not settings.fast_token_estimate:
+            return [len(tokens) for tokens in self._encode_values(values, model_id)]
+        
+        short = [
+            len(value) <= self.SHORT_TEXT_MAX_LENGTH and value.isascii()
+            for value in values
+        ]
+        encoded = iter(self._encode_values(
+            [value for value, is_short in zip(values, short) if not is_short],
+            model_id
+        ))
+        return [
+            (len(value) + 3) // 4 if is_short else len(next(encoded))
+            for value, is_short in zip(values, short)
+        ]
+    
+    def _encode_values(self, values: List[str], model_id: str) -> List[List[int]]:
+        """
+        Tokenize message fields, in parallel when there are many.
+        
+        Args:
+            values: Field values to tokenize
+            model_id: Model ID for tokenizer selection
         
-        # Add safety buffer
-        buffered_tokens = int(num_tokens * self.BUFFER_MULTIPLIER)
+        Returns:
+            Token lists in the same order as values
+        """
+        if not values:
+            return []
+        
+        encoding = self._get_encoding_for_model(model_id)
+        
+        # Content never needs special tokens
+        if len(values) >= self.BATCH_ENCODE_MIN_VALUES:
+            return encoding.encode_ordinary_batch(values, num_threads=4)
+        return [encoding.encode_ordinary(value) for value in values]
+    
+    @classmethod
+    def _token_counts(cls, num_tokens: int) -> Dict[str, int]:
+        """Build the estimate dict, adding the safety buffer."""
+        return {
+            "estimated_tokens": num_tokens,
+            "buffered_tokens": int(num_tokens * cls.BUFFER_MULTIPLIER)
+        }
+    
+    @classmethod
+    def fast_estimate_messages_tokens(
+        cls,
+        messages: List[Dict[str, str]]
+    ) -> Dict[str, int]:
+        """
+        Roughly estimate token count without running the tokenizer.
+        
+        Assumes ~4 bytes of UTF-8 per token plus the usual per-message
+        overhead. Good enough for pre-flight checks far from any limit.
+        
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+        
+        Returns:
+            Dict with 'estimated_tokens' and 'buffered_tokens'
+        """
+        content_bytes = sum(len(m.get("content", "").encode("utf-8")) for m in messages)
+        num_tokens = content_bytes // 4 + 3 * len(messages) + 3
         
         return {
             "estimated_tokens": num_tokens,
-            "buffered_tokens": buffered_tokens
+            "buffered_tokens": int(num_tokens * cls.BUFFER_MULTIPLIER)
         }
     
     def estimate_cost(
@@ -84,7 +270,9 @@ class TokenEstimator:
         model_id: str,
         input_price_per_1m: float,
         output_price_per_1m: float,
-        expected_output_tokens: int = 500
+        expected_output_tokens: int = 500,
+        fast: bool = False,
+        input_tokens: Optional[int] = None
     ) -> Dict[str, float]:
         """
         Estimate cost for a request before sending it.
@@ -95,13 +283,19 @@ class TokenEstimator:
             input_price_per_1m: Price per 1M input tokens
             output_price_per_1m: Price per 1M output tokens
             expected_output_tokens: Estimated response length (default 500)
+            fast: Use the byte-length heuristic instead of the tokenizer
+            input_tokens: Already-estimated (buffered) input tokens; skips tokenizing
         
         Returns:
             Dict with cost estimates in USD
         """
         # Estimate input tokens
-        token_estimate = self.estimate_messages_tokens(messages, model_id)
-        input_tokens = token_estimate["buffered_tokens"]
+        if input_tokens is None:
+            if fast:
+                token_estimate = self.fast_estimate_messages_tokens(messages)
+            else:
+                token_estimate = self.estimate_messages_tokens(messages, model_id)
+            input_tokens = token_estimate["buffered_tokens"]
         
         # Use provided output estimate (could be smarter in future)
         output_tokens = expected_output_tokens
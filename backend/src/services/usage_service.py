@@ -0,0 +1,154 @@
+"""Usage aggregation backed by the daily rollup table."""
+from datetime import date, datetime, time, timedelta
+from typing import Any, List, Optional
+from sqlalchemy import Date, and_, case, delete, func, insert, or_, select, union_all
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from src.models.schemas import Request, UsageDaily
+
+# Days this recent are never rolled up: rows are written with their start
+# time, so a batch running past midnight can still add to yesterday
+ROLLUP_GRACE_DAYS = 2
+
+
+def _day_of(column) -> Any:
+    """SQL expression for the (UTC) calendar day of a timestamp column."""
+    return func.date(column, type_=Date)
+
+
+def _aggregate_requests(*criteria) -> Any:
+    """
+    SELECT that aggregates requests into usage_daily's shape.
+    
+    Args:
+        *criteria: WHERE clauses applied to requests
+    
+    Returns:
+        Select grouped by user, day, provider and model
+    """
+    day = _day_of(Request.created_at)
+    return select(
+        Request.user_id,
+        day.label("day"),
+        Request.provider_id,
+        Request.model_id,
+        func.count().label("requests"),
+        func.sum(case((Request.status == "success", 1), else_=0)).label("success_count"),
+        func.coalesce(func.sum(Request.input_tokens), 0).label("input_tokens"),
+        func.coalesce(func.sum(Request.output_tokens), 0).label("output_tokens"),
+        func.coalesce(func.sum(Request.total_cost_usd), 0.0).label("cost_usd"),
+        func.coalesce(func.sum(Request.latency_ms), 0).label("latency_sum_ms")
+    ).where(*criteria).group_by(
+        Request.user_id, day, Request.provider_id, Request.model_id
+    )
+
+
+def _start_of(day: date) -> datetime:
+    """Midnight at the start of a day."""
+    return datetime.combine(day, time.min)
+
+
+class UsageService:
+    """Serve usage statistics from daily rollups plus live recent requests."""
+    
+    def __init__(self, db: Session):
+        """
+        Initialize usage service.
+        
+        Args:
+            db: SQLAlchemy session
+        """
+        self.db = db
+    
+    def refresh_rollups(self, rebuild: bool = False) -> Optional[date]:
+        """
+        Roll up every settled day not yet in usage_daily.
+        
+        Days older than ROLLUP_GRACE_DAYS no longer receive requests, so
+        only days after the newest rolled up day are aggregated (at most
+        once a day in practice). Requests inserted with older timestamps
+        (e.g. generated test data) need a rebuild to be counted. Meant to
+        run from a job (see src/utils/refresh_rollups.py), not per request.
+        
+        Args:
+            rebuild: Discard existing rollups and aggregate all history
+        
+        Returns:
+            Newest rolled-up day, or None if nothing is rolled up yet
+        """
+        # First day still within the grace period (not rolled up)
+        open_day = datetime.utcnow().date() - timedelta(days=ROLLUP_GRACE_DAYS - 1)
+        
+        if rebuild:
+            self.db.execute(delete(UsageDaily))
+            last_day = None
+        else:
+            last_day = self.db.scalar(select(func.max(UsageDaily.day)))
+            if last_day is not None and last_day >= open_day - timedelta(days=1):
+                return last_day
+        
+        criteria = [Request.created_at < _start_of(open_day)]
+        if last_day is not None:
+            criteria.append(Request.created_at >= _start_of(last_day + timedelta(days=1)))
+        
+        rollup = _aggregate_requests(*criteria)
+        columns = [column.name for column in rollup.selected_columns]
+        
+        try:
+            self.db.execute(insert(UsageDaily).from_select(columns, rollup))
+            self.db.commit()
+        except IntegrityError:
+            # A concurrent refresh inserted the same days first
+            self.db.rollback()
+        
+        return self.db.scalar(select(func.max(UsageDaily.day)))
+    
+    def get_usage_groups(self, user_id, start_date: datetime) -> List[Any]:
+        """
+        Get a user's usage since a point in time, grouped per day/provider/model.
+        
+        Whole days already rolled up are read from usage_daily; the partial
+        first day and anything newer than the rollups are aggregated from
+        requests directly, so results match a scan of the raw table. Only
+        reads: rollups are refreshed separately.
+        
+        Args:
+            user_id: User UUID
+            start_date: Only count requests created at or after this time
+        
+        Returns:
+            Rows with day, provider_id, model_id, requests, success_count,
+            cost_usd and latency_sum_ms (a group may appear more than once)
+        """
+        last_day = self.db.scalar(select(func.max(UsageDaily.day)))
+        
+        # Rollups cover [first_full_day, live_from_day); a start at
+        # midnight leaves no partial first day to aggregate live
+        first_full_day = start_date.date()
+        if start_date.time() != time.min:
+            first_full_day += timedelta(days=1)
+        live_from_day = max(first_full_day, last_day + timedelta(days=1)) if last_day else first_full_day
+        
+        fields = ("day", "provider_id", "model_id", "requests", "success_count", "cost_usd", "latency_sum_ms")
+        
+        live = _aggregate_requests(
+            Request.user_id == user_id,
+            Request.created_at >= start_date,
+            or_(
+                Request.created_at < _start_of(first_full_day),
+                Request.created_at >= _start_of(live_from_day)
+            )
+        ).subquery()
+        
+        rolled_up = select(*(getattr(UsageDaily, field) for field in fields)).where(
+            and_(
+                UsageDaily.user_id == user_id,
+                UsageDaily.day >= first_full_day,
+                UsageDaily.day < live_from_day
+            )
+        )
+        
+        return self.db.execute(
+            union_all(select(*(live.c[field] for field in fields)), rolled_up)
+        ).all()
@@ -0,0 +1,18 @@
+"""API key hashing helpers."""
+import hashlib
+
+# 128-bit digest: fixed-size, indexed lookup key for API keys
+API_KEY_HASH_SIZE = 16
+
+
+def hash_api_key(api_key: str) -> bytes:
+    """
+    Hash an API key for storage and lookup.
+    
+    Args:
+        api_key: Plaintext API key
+    
+    Returns:
+        BLAKE2b digest of the key (16 bytes)
+    """
+    return hashlib.blake2b(api_key.encode(), digest_size=API_KEY_HASH_SIZE).digest()
@@ -3,10 +3,13 @@ import sys
 import secrets
 from pathlib import Path
 
-sys.path.append(str(Path(__file__).parent.parent.parent))
+# Only needed when run as a script; importing this module leaves sys.path alone
+if __name__ == "__main__":
+    sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.models.database import SessionLocal
 from src.models.schemas import User
+from src.utils.api_keys import hash_api_key
 
 
 def create_test_user():
@@ -19,14 +22,17 @@ def create_test_user():
         
         user = User(
             api_key=api_key,
+            api_key_hash=hash_api_key(api_key),
             is_active=True
         )
         db.add(user)
+        # Flush assigns the ID; reading it before commit avoids a reload
+        db.flush()
+        user_id = user.id
         db.commit()
-        db.refresh(user)
         
         print(f"✅ Created test user")
-        print(f"User ID: {user.id}")
+        print(f"User ID: {user_id}")
         print(f"API Key: {api_key}")
         print(f"\n⚠️  Save this API key - you'll need it to test the API!")
         
@@ -4,10 +4,17 @@ from pathlib import Path
 from datetime import datetime, timedelta
 import random
 
-sys.path.append(str(Path(__file__).parent.parent.parent))
+from sqlalchemy import insert
+from sqlalchemy.orm import joinedload
+
+# Only needed when run as a script; importing this module leaves sys.path alone
+if __name__ == "__main__":
+    sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.models.database import SessionLocal
 from src.models.schemas import Request, User, Model
+from src.services.cost_calculator import cost_from_rates
+from src.services.usage_service import UsageService
 import uuid
 
 
@@ -23,7 +30,7 @@ def generate_test_requests(num_requests: int = 50):
             return
         
         # Get available models
-        models = db.query(Model).all()
+        models = db.query(Model).options(joinedload(Model.provider)).all()
         if not models:
             print("❌ No models found. Run seed_data.py first")
             return
@@ -51,45 +58,73 @@ def generate_test_requests(num_requests: int = 50):
             "Photosynthesis is the process..."
         ]
         
-        for i in range(num_requests):
-            # Random data
-            model = random.choice(models)
-            created_at = datetime.utcnow() - timedelta(days=random.randint(0, 29))
-            input_tokens = random.randint(20, 200)
-            output_tokens = random.randint(30, 300)
-            latency_ms = random.randint(500, 3000)
-            status = "success" if random.random() > 0.05 else "error"  # 95% success
-            
-            # Calculate cost
-            input_cost = (input_tokens / 1_000_000) * model.input_price_per_1m_tokens
-            output_cost = (output_tokens / 1_000_000) * model.output_price_per_1m_tokens
-            total_cost = input_cost + output_cost
-            
-            req = Request(
+        # Sample every column up front, one call per column
+        now = datetime.utcnow()
+        sampled = zip(
+            random.choices(models, k=num_requests),
+            random.choices(range(0, 30), k=num_requests),  # days ago
+            random.choices(range(20, 201), k=num_requests),  # input tokens
+            random.choices(range(30, 301), k=num_requests),  # output tokens
+            random.choices(range(500, 3001), k=num_requests),  # latency ms
+            [random.random() > 0.05 for _ in range(num_requests)],  # 95% success
+            random.choices(sample_prompts, k=num_requests),
+            random.choices(sample_responses, k=num_requests)
+        )
+        
+        rows = []
+        for model, days_ago, input_tokens, output_tokens, latency_ms, success, prompt, response in sampled:
+            created_at = now - timedelta(days=days_ago)
+            row = dict(
                 id=uuid.uuid4(),
                 user_id=user.id,
                 model_id=model.id,
                 provider_id=model.provider_id,
-                prompt_text=random.choice(sample_prompts),
-                response_text=random.choice(sample_responses) if status == "success" else None,
-                input_tokens=input_tokens if status == "success" else None,
-                output_tokens=output_tokens if status == "success" else None,
-                total_tokens=input_tokens + output_tokens if status == "success" else None,
-                input_cost_usd=round(input_cost, 8) if status == "success" else None,
-                output_cost_usd=round(output_cost, 8) if status == "success" else None,
-                total_cost_usd=round(total_cost, 8) if status == "success" else None,
+                model_slug=model.model_id,
+                provider_slug=model.provider.name,
+                prompt_text=prompt,
                 latency_ms=latency_ms,
-                status=status,
-                error_message="Rate limit exceeded" if status == "error" else None,
                 created_at=created_at,
                 completed_at=created_at
             )
-            db.add(req)
             
-            if (i + 1) % 10 == 0:
-                print(f"  Generated {i + 1}/{num_requests}...")
+            if success:
+                input_cost, output_cost, total_cost = cost_from_rates(
+                    input_tokens,
+                    output_tokens,
+                    model.input_price_per_token,
+                    model.output_price_per_token
+                )
+                row.update(
+                    response_text=response,
+                    input_tokens=input_tokens,
+                    output_tokens=output_tokens,
+                    total_tokens=input_tokens + output_tokens,
+                    input_cost_usd=input_cost,
+                    output_cost_usd=output_cost,
+                    total_cost_usd=total_cost,
+                    status="success",
+                    error_message=None
+                )
+            else:
+                row.update(
+                    response_text=None,
+                    input_tokens=None,
+                    output_tokens=None,
+                    total_tokens=None,
+                    input_cost_usd=None,
+                    output_cost_usd=None,
+                    total_cost_usd=None,
+                    status="error",
+                    error_message="Rate limit exceeded"
+                )
+            rows.append(row)
         
+        # Insert all rows in one executemany round trip
+        db.execute(insert(Request), rows)
         db.commit()
+        
+        # Rows are backdated, so rebuild the daily rollups to include them
+        UsageService(db).refresh_rollups(rebuild=True)
         print(f"✅ Successfully generated {num_requests} test requests!")
         
     except Exception as e:
@@ -1,7 +1,16 @@
 """Centralized logging configuration."""
 import logging
 import sys
-from datetime import datetime
+
+# Structured format, shared by every logger in the app
+_FORMATTER = logging.Formatter(
+    '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+# Single console handler; level filtering happens on each logger
+_HANDLER = logging.StreamHandler(sys.stdout)
+_HANDLER.setFormatter(_FORMATTER)
 
 
 def setup_logger(name: str, level: str = "INFO") -> logging.Logger:
@@ -17,25 +26,12 @@ def setup_logger(name: str, level: str = "INFO") -> logging.Logger:
     """
     logger = logging.getLogger(name)
     
-    # Convert string level to logging constant
-    log_level = getattr(logging, level.upper(), logging.INFO)
-    logger.setLevel(log_level)
-    
-    # Avoid duplicate handlers
+    # Already configured
     if logger.handlers:
         return logger
     
-    # Console handler with formatting
-    handler = logging.StreamHandler(sys.stdout)
-    handler.setLevel(log_level)
-    
-    # Structured format
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    handler.setFormatter(formatter)
-    
-    logger.addHandler(handler)
+    # Convert string level to logging constant
+    logger.setLevel(getattr(logging, level.upper(), logging.INFO))
+    logger.addHandler(_HANDLER)
     
-    return logger
\ No newline at end of file
+    return logger
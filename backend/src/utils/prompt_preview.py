@@ -0,0 +1,20 @@
+"""Prompt preview helpers."""
+
+# Characters of the prompt kept in previews (an ellipsis marks truncation)
+PROMPT_PREVIEW_LENGTH = 50
+
+
+def make_prompt_preview(prompt_text: str) -> str:
+    """
+    Shorten a prompt for list views.
+    
+    Args:
+        prompt_text: Full prompt text
+    
+    Returns:
+        The prompt, truncated to PROMPT_PREVIEW_LENGTH characters plus "..."
+        when longer
+    """
+    if len(prompt_text) > PROMPT_PREVIEW_LENGTH:
+        return prompt_text[:PROMPT_PREVIEW_LENGTH] + "..."
+    return prompt_text
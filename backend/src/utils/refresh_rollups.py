@@ -0,0 +1,36 @@
+"""Bring the usage_daily rollups up to date (run periodically, e.g. from cron)."""
+import argparse
+import sys
+from pathlib import Path
+
+# Only needed when run as a script; importing this module leaves sys.path alone
+if __name__ == "__main__":
+    sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.models.database import SessionLocal
+from src.services.usage_service import UsageService
+
+
+def refresh_rollups(rebuild: bool = False):
+    """
+    Roll up every settled day not yet in usage_daily.
+    
+    Args:
+        rebuild: Discard existing rollups and aggregate all history
+    """
+    db = SessionLocal()
+    
+    try:
+        last_day = UsageService(db).refresh_rollups(rebuild=rebuild)
+        print(f"✅ Usage rolled up through {last_day}" if last_day else "✅ No settled days to roll up yet")
+    except Exception as e:
+        print(f"❌ Error refreshing rollups: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild all rollups from scratch")
+    refresh_rollups(rebuild=parser.parse_args().rebuild)
@@ -1,297 +1,141 @@
 """Seed initial data into database."""
 import sys
 from pathlib import Path
+from typing import NamedTuple, Tuple
 
-# Add parent directory to path so we can import our modules
-sys.path.append(str(Path(__file__).parent.parent.parent))
+# When run as a script, add the backend directory to the path so we can
+# import our modules (importing this module leaves sys.path alone)
+if __name__ == "__main__":
+    sys.path.append(str(Path(__file__).parent.parent.parent))
 
+from sqlalchemy import literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 from src.models.database import SessionLocal
 from src.models.schemas import Provider, Model
+from src.services.cache_service import CacheService, MODELS_CACHE_KEY
+from src.services.model_selector import clear_model_catalog_cache
+
+
+class ModelSpec(NamedTuple):
+    """A model to seed, with pricing per 1M tokens (USD)."""
+    model_id: str
+    display_name: str
+    input_price: float
+    output_price: float
+    context_window: int
+
+
+class ProviderSpec(NamedTuple):
+    """A provider to seed, with its models."""
+    name: str
+    base_url: str
+    models: Tuple[ModelSpec, ...]
 
 
-def seed_providers_and_models():
-    """Add providers and models to database."""
+# Full catalog the seed script creates; extend this table to add providers or models
+DEFAULT_PROVIDERS: Tuple[ProviderSpec, ...] = (
+    # OpenAI models with current pricing (as of Jan 2025)
+    ProviderSpec("openai", "https://api.openai.com/v1", (
+        ModelSpec("gpt-4o", "GPT-4o", 2.50, 10.00, 128000),
+        ModelSpec("gpt-4o-mini", "GPT-4o Mini", 0.15, 0.60, 128000),
+        ModelSpec("gpt-3.5-turbo", "GPT-3.5 Turbo", 0.50, 1.50, 16385)
+    )),
+    # Anthropic models with current pricing (Oct 2025)
+    ProviderSpec("anthropic", "https://api.anthropic.com/v1", (
+        ModelSpec("claude-opus-4-1-20250805", "Claude Opus 4.1", 15.00, 75.00, 200000),
+        ModelSpec("claude-opus-4-20250514", "Claude Opus 4", 15.00, 75.00, 200000),
+        ModelSpec("claude-sonnet-4-5-20250929", "Claude Sonnet 4.5", 3.00, 15.00, 200000),
+        ModelSpec("claude-sonnet-4-20250514", "Claude Sonnet 4", 3.00, 15.00, 200000),
+        ModelSpec("claude-3-5-haiku-20241022", "Claude 3.5 Haiku", 0.80, 4.00, 200000)
+    )),
+    # DeepSeek models with current pricing (Oct 2025)
+    # Using cache-miss prices (worst case)
+    ProviderSpec("deepseek", "https://api.deepseek.com/v1", (
+        ModelSpec("deepseek-chat", "DeepSeek Chat", 0.28, 0.42, 64000),
+        ModelSpec("deepseek-reasoner", "DeepSeek Reasoner", 0.56, 1.68, 64000)
+    )),
+    # Google Gemini models with current pricing (Oct 2025)
+    ProviderSpec("google", "https://generativelanguage.googleapis.com", (
+        ModelSpec("gemini-2.5-pro", "Gemini 2.5 Pro", 1.25, 10.00, 200000),
+        ModelSpec("gemini-2.5-flash", "Gemini 2.5 Flash", 0.30, 2.50, 1000000),
+        ModelSpec("gemini-2.5-flash-lite", "Gemini 2.5 Flash Lite", 0.10, 0.40, 1000000),
+        ModelSpec("gemini-2.0-flash", "Gemini 2.0 Flash", 0.10, 0.40, 1000000)
+    ))
+)
+
+
+def seed_providers_and_models(providers: Tuple[ProviderSpec, ...] = DEFAULT_PROVIDERS):
+    """
+    Add providers and models to database.
+    
+    Args:
+        providers: Providers and models to seed (defaults to the full catalog)
+    """
     db: Session = SessionLocal()
     
+    # Report lines, written out in one go once the seed has committed
+    report = []
+    
     try:
-        # ============================================================
-        # OPENAI PROVIDER
-        # ============================================================
-        openai_provider = db.query(Provider).filter(Provider.name == "openai").first()
-        
-        if not openai_provider:
-            openai_provider = Provider(
-                name="openai",
-                base_url="https://api.openai.com/v1",
-                is_active=True
-            )
-            db.add(openai_provider)
-            db.commit()
-            db.refresh(openai_provider)
-            print(f"✓ Created provider: {openai_provider.name}")
-        else:
-            print(f"✓ Provider already exists: {openai_provider.name}")
-        
-        # OpenAI models with current pricing (as of Jan 2025)
-        openai_models = [
-            {
-                "model_id": "gpt-4o",
-                "display_name": "GPT-4o",
-                "input_price": 2.50,
-                "output_price": 10.00,
-                "context_window": 128000
-            },
-            {
-                "model_id": "gpt-4o-mini",
-                "display_name": "GPT-4o Mini",
-                "input_price": 0.15,
-                "output_price": 0.60,
-                "context_window": 128000
-            },
-            {
-                "model_id": "gpt-3.5-turbo",
-                "display_name": "GPT-3.5 Turbo",
-                "input_price": 0.50,
-                "output_price": 1.50,
-                "context_window": 16385
-            }
-        ]
-        
-        for model_data in openai_models:
-            existing_model = db.query(Model).filter(
-                Model.provider_id == openai_provider.id,
-                Model.model_id == model_data["model_id"]
-            ).first()
+        # One transaction for the whole seed: committed on success,
+        # rolled back if anything fails
+        with db.begin():
+            # Create missing providers and fetch every provider's ID in one
+            # statement. The no-op update makes existing rows show up in
+            # RETURNING; xmax = 0 only for rows this statement inserted.
+            stmt = pg_insert(Provider).values([
+                {"name": spec.name, "base_url": spec.base_url, "is_active": True}
+                for spec in providers
+            ])
+            provider_rows = db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["name"],
+                    set_={"name": stmt.excluded.name}
+                ).returning(Provider.name, Provider.id, literal_column("xmax = 0"))
+            ).all()
             
-            if not existing_model:
-                model = Model(
-                    provider_id=openai_provider.id,
-                    model_id=model_data["model_id"],
-                    display_name=model_data["display_name"],
-                    input_price_per_1m_tokens=model_data["input_price"],
-                    output_price_per_1m_tokens=model_data["output_price"],
-                    context_window=model_data["context_window"],
-                    is_active=True
-                )
-                db.add(model)
-                print(f"  ✓ Created model: {model_data['model_id']}")
-            else:
-                print(f"  ✓ Model already exists: {model_data['model_id']}")
-        
-        # ============================================================
-        # ANTHROPIC PROVIDER
-        # ============================================================
-        anthropic_provider = db.query(Provider).filter(Provider.name == "anthropic").first()
-        
-        if not anthropic_provider:
-            anthropic_provider = Provider(
-                name="anthropic",
-                base_url="https://api.anthropic.com/v1",
-                is_active=True
-            )
-            db.add(anthropic_provider)
-            db.commit()
-            db.refresh(anthropic_provider)
-            print(f"✓ Created provider: {anthropic_provider.name}")
-        else:
-            print(f"✓ Provider already exists: {anthropic_provider.name}")
-        
-        # Anthropic models with current pricing (Oct 2025)
-        anthropic_models = [
-            {
-                "model_id": "claude-opus-4-1-20250805",
-                "display_name": "Claude Opus 4.1",
-                "input_price": 15.00,
-                "output_price": 75.00,
-                "context_window": 200000
-            },
-            {
-                "model_id": "claude-opus-4-20250514",
-                "display_name": "Claude Opus 4",
-                "input_price": 15.00,
-                "output_price": 75.00,
-                "context_window": 200000
-            },
-            {
-                "model_id": "claude-sonnet-4-5-20250929",
-                "display_name": "Claude Sonnet 4.5",
-                "input_price": 3.00,
-                "output_price": 15.00,
-                "context_window": 200000
-            },
-            {
-                "model_id": "claude-sonnet-4-20250514",
-                "display_name": "Claude Sonnet 4",
-                "input_price": 3.00,
-                "output_price": 15.00,
-                "context_window": 200000
-            },
-            {
-                "model_id": "claude-3-5-haiku-20241022",
-                "display_name": "Claude 3.5 Haiku",
-                "input_price": 0.80,
-                "output_price": 4.00,
-                "context_window": 200000
-            }
-        ]
-        
-        for model_data in anthropic_models:
-            existing_model = db.query(Model).filter(
-                Model.provider_id == anthropic_provider.id,
-                Model.model_id == model_data["model_id"]
-            ).first()
-            
-            if not existing_model:
-                model = Model(
-                    provider_id=anthropic_provider.id,
-                    model_id=model_data["model_id"],
-                    display_name=model_data["display_name"],
-                    input_price_per_1m_tokens=model_data["input_price"],
-                    output_price_per_1m_tokens=model_data["output_price"],
-                    context_window=model_data["context_window"],
-                    is_active=True
-                )
-                db.add(model)
-                print(f"  ✓ Created model: {model_data['model_id']}")
-            else:
-                print(f"  ✓ Model already exists: {model_data['model_id']}")
-        
-        # ============================================================
-        # DEEPSEEK PROVIDER
-        # ============================================================
-        deepseek_provider = db.query(Provider).filter(Provider.name == "deepseek").first()
-        
-        if not deepseek_provider:
-            deepseek_provider = Provider(
-                name="deepseek",
-                base_url="https://api.deepseek.com/v1",
-                is_active=True
-            )
-            db.add(deepseek_provider)
-            db.commit()
-            db.refresh(deepseek_provider)
-            print(f"✓ Created provider: {deepseek_provider.name}")
-        else:
-            print(f"✓ Provider already exists: {deepseek_provider.name}")
-        
-        # DeepSeek models with current pricing (Oct 2025)
-        # Using cache-miss prices (worst case)
-        deepseek_models = [
-            {
-                "model_id": "deepseek-chat",
-                "display_name": "DeepSeek Chat",
-                "input_price": 0.28,
-                "output_price": 0.42,
-                "context_window": 64000
-            },
-            {
-                "model_id": "deepseek-reasoner",
-                "display_name": "DeepSeek Reasoner",
-                "input_price": 0.56,
-                "output_price": 1.68,
-                "context_window": 64000
-            }
-        ]
-        
-        for model_data in deepseek_models:
-            existing_model = db.query(Model).filter(
-                Model.provider_id == deepseek_provider.id,
-                Model.model_id == model_data["model_id"]
-            ).first()
+            provider_ids = {}
+            for name, provider_id, created in provider_rows:
+                provider_ids[name] = provider_id
+                status = "Created provider" if created else "Provider already exists"
+                report.append(f"✓ {status}: {name}")
             
-            if not existing_model:
-                model = Model(
-                    provider_id=deepseek_provider.id,
-                    model_id=model_data["model_id"],
-                    display_name=model_data["display_name"],
-                    input_price_per_1m_tokens=model_data["input_price"],
-                    output_price_per_1m_tokens=model_data["output_price"],
-                    context_window=model_data["context_window"],
+            # Same for models, keyed on (provider_id, model_id)
+            model_rows = [
+                dict(
+                    provider_id=provider_ids[spec.name],
+                    model_id=model.model_id,
+                    display_name=model.display_name,
+                    input_price_per_1m_tokens=model.input_price,
+                    output_price_per_1m_tokens=model.output_price,
+                    context_window=model.context_window,
                     is_active=True
                 )
-                db.add(model)
-                print(f"  ✓ Created model: {model_data['model_id']}")
-            else:
-                print(f"  ✓ Model already exists: {model_data['model_id']}")
-        
-        # ============================================================
-        # GOOGLE PROVIDER
-        # ============================================================
-        google_provider = db.query(Provider).filter(Provider.name == "google").first()
-        
-        if not google_provider:
-            google_provider = Provider(
-                name="google",
-                base_url="https://generativelanguage.googleapis.com",
-                is_active=True
-            )
-            db.add(google_provider)
-            db.commit()
-            db.refresh(google_provider)
-            print(f"✓ Created provider: {google_provider.name}")
-        else:
-            print(f"✓ Provider already exists: {google_provider.name}")
-        
-        # Google Gemini models with current pricing (Oct 2025)
-        google_models = [
-            {
-                "model_id": "gemini-2.5-pro",
-                "display_name": "Gemini 2.5 Pro",
-                "input_price": 1.25,
-                "output_price": 10.00,
-                "context_window": 200000
-            },
-            {
-                "model_id": "gemini-2.5-flash",
-                "display_name": "Gemini 2.5 Flash",
-                "input_price": 0.30,
-                "output_price": 2.50,
-                "context_window": 1000000
-            },
-            {
-                "model_id": "gemini-2.5-flash-lite",
-                "display_name": "Gemini 2.5 Flash Lite",
-                "input_price": 0.10,
-                "output_price": 0.40,
-                "context_window": 1000000
-            },
-            {
-                "model_id": "gemini-2.0-flash",
-                "display_name": "Gemini 2.0 Flash",
-                "input_price": 0.10,
-                "output_price": 0.40,
-                "context_window": 1000000
-            }
-        ]
-        
-        for model_data in google_models:
-            existing_model = db.query(Model).filter(
-                Model.provider_id == google_provider.id,
-                Model.model_id == model_data["model_id"]
-            ).first()
-            
-            if not existing_model:
-                model = Model(
-                    provider_id=google_provider.id,
-                    model_id=model_data["model_id"],
-                    display_name=model_data["display_name"],
-                    input_price_per_1m_tokens=model_data["input_price"],
-                    output_price_per_1m_tokens=model_data["output_price"],
-                    context_window=model_data["context_window"],
-                    is_active=True
-                )
-                db.add(model)
-                print(f"  ✓ Created model: {model_data['model_id']}")
-            else:
-                print(f"  ✓ Model already exists: {model_data['model_id']}")
-        
-        db.commit()
-        print("\n✅ Seed data complete!")
+                for spec in providers
+                for model in spec.models
+            ]
+            created_models = set(db.execute(
+                pg_insert(Model)
+                .values(model_rows)
+                .on_conflict_do_nothing(index_elements=["provider_id", "model_id"])
+                .returning(Model.provider_id, Model.model_id)
+            ).all())
+            for row in model_rows:
+                status = "Created model" if (row["provider_id"], row["model_id"]) in created_models else "Model already exists"
+                report.append(f"  ✓ {status}: {row['model_id']}")
+        
+        # Serve the updated catalog from /v1/analytics/models right away;
+        # a separately running server picks it up for routing within
+        # CATALOG_TTL_SECONDS
+        CacheService().delete(MODELS_CACHE_KEY)
+        clear_model_catalog_cache()
+        
+        report.append("\n✅ Seed data complete!")
+        sys.stdout.write("\n".join(report) + "\n")
         
     except Exception as e:
         print(f"❌ Error seeding data: {e}")
-        db.rollback()
     finally:
         db.close()
 
@@ -1,4 +1,5 @@
 """Tests for analytics endpoints."""
+import json
 import pytest
 from datetime import datetime, timedelta
 
@@ -55,6 +56,29 @@ class TestUsageEndpoint:
         assert data["total_requests"] < 10
         assert data["total_requests"] >= 1
     
+    def test_usage_stats_rollups(self, client, auth_headers, test_requests, db):
+        """Test settled days are rolled up and give the same stats."""
+        from src.models.schemas import UsageDaily
+        from src.services.usage_service import ROLLUP_GRACE_DAYS, UsageService
+        
+        # Reading stats never writes rollups
+        first = client.get("/v1/analytics/usage?days=30", headers=auth_headers).json()
+        assert db.query(UsageDaily).count() == 0
+        
+        # Every request outside the grace period is rolled up (the fixture
+        # has one every third day, so only today's is within it)
+        UsageService(db).refresh_rollups()
+        today = datetime.utcnow().date()
+        rollups = db.query(UsageDaily).all()
+        assert sum(r.requests for r in rollups) == 9
+        assert all(r.day <= today - timedelta(days=ROLLUP_GRACE_DAYS) for r in rollups)
+        
+        # Served from the rollups now, with identical results
+        second = client.get("/v1/analytics/usage?days=30", headers=auth_headers).json()
+        assert second == first
+        assert first["total_requests"] == 10
+        assert len(first["daily_stats"]) == 10
+    
     def test_usage_stats_no_data(self, client, auth_headers):
         """Test with no requests in database."""
         response = client.get(
@@ -120,6 +144,7 @@ class TestRequestsListEndpoint:
         assert data["page"] == 1
         assert data["per_page"] == 20
         assert data["total_pages"] == 1
+        assert data["total_is_estimate"] is False
         assert len(data["requests"]) == 10
         
         # Check request structure
@@ -278,6 +303,8 @@ class TestRequestsListEndpoint:
             user_id=test_user.id,
             model_id=test_models[0].id,
             provider_id=test_provider.id,
+            model_slug=test_models[0].model_id,
+            provider_slug=test_provider.name,
             prompt_text=long_prompt,
             response_text="Response",
             status="success",
@@ -302,6 +329,35 @@ class TestRequestsListEndpoint:
         assert long_req["prompt_preview"].endswith("...")
 
 
+class TestRequestsExportEndpoint:
+    """Tests for GET /v1/analytics/requests/export"""
+    
+    def test_export_requests(self, client, auth_headers, test_requests):
+        """Test streaming every request as NDJSON, newest first."""
+        response = client.get("/v1/analytics/requests/export", headers=auth_headers)
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["id"] for row in rows] == [str(req.id) for req in test_requests]
+        assert rows[0]["model"] == "gpt-4o-mini"
+        assert rows[0]["provider"] == "openai"
+    
+    def test_export_requests_filtered(self, client, auth_headers, test_requests):
+        """Test export applies the list filters."""
+        response = client.get(
+            "/v1/analytics/requests/export?status=error",
+            headers=auth_headers
+        )
+        
+        assert response.status_code == 200
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert len(rows) == 1
+        assert rows[0]["status"] == "error"
+        assert rows[0]["error_message"] == "Test error"
+
+
 class TestRequestDetailEndpoint:
     """Tests for GET /v1/analytics/requests/{id}"""
     
@@ -497,4 +553,15 @@ class TestAuthentication:
         headers = {"X-API-Key": test_user.api_key}
         
         response = client.get("/v1/analytics/usage", headers=headers)
-        assert response.status_code == 401
\ No newline at end of file
+        assert response.status_code == 401
+    
+    def test_deactivated_after_cached_lookup(self, client, db, test_user, auth_headers):
+        """Test that deactivation applies to an already cached key."""
+        response = client.get("/v1/analytics/models", headers=auth_headers)
+        assert response.status_code == 200
+        
+        test_user.is_active = False
+        db.commit()
+        
+        response = client.get("/v1/analytics/models", headers=auth_headers)
+        assert response.status_code == 401
@@ -0,0 +1,95 @@
+"""Tests for batch processing."""
+import asyncio
+import pytest
+
+from src.models.schemas import Request
+from src.services.batch_service import BatchService
+
+
+class TestBatchService:
+    """Test batch processing against a stubbed provider."""
+    
+    @pytest.fixture
+    def service(self, db, monkeypatch):
+        """Batch service whose provider and cache lookups are recorded."""
+        service = BatchService(db)
+        service.cache_lookups = []
+        
+        def fake_get_many(items):
+            service.cache_lookups.extend(items)
+            return [None] * len(items)
+        
+        class FakeProvider:
+            async def send_request_bounded(self, messages, model, **kwargs):
+                return {
+                    "success": True,
+                    "content": "ok",
+                    "finish_reason": "stop",
+                    "usage": {"input_tokens": 5, "output_tokens": 2, "total_tokens": 7},
+                    "latency_ms": 10,
+                    "model": model,
+                    "error": None
+                }
+        
+        service.inflight_temperatures = []
+        deduplicate = service.cache_service.deduplicate
+        
+        async def recording_deduplicate(messages, model_id, temperature, max_tokens, fetch):
+            service.inflight_temperatures.append(temperature)
+            return await deduplicate(messages, model_id, temperature, max_tokens, fetch)
+        
+        monkeypatch.setattr(service.cache_service, "get_many", fake_get_many)
+        monkeypatch.setattr(service.cache_service, "deduplicate", recording_deduplicate)
+        monkeypatch.setattr(service, "providers", {"openai": FakeProvider()})
+        return service
+    
+    @pytest.mark.asyncio
+    async def test_zero_temperature_cache_key(self, service, test_user, test_models):
+        """Test that an explicit temperature of 0 isn't keyed as the default."""
+        requests = [{"messages": [{"role": "user", "content": "Hi"}]}]
+        
+        result = await service.process_batch(
+            user_id=test_user.id,
+            model_id="gpt-4o-mini",
+            requests=requests,
+            request_params={"temperature": 0}
+        )
+        
+        assert result["successful"] == 1
+        assert [item[2] for item in service.cache_lookups] == [0]
+        assert service.inflight_temperatures == [0]
+    
+    @pytest.mark.asyncio
+    async def test_failure_not_shared_as_success(self, service, db, monkeypatch, test_user, test_models):
+        """Test that identical requests joining a failed call are all errors."""
+        calls = []
+        
+        class FailingProvider:
+            async def send_request_bounded(self, messages, model, **kwargs):
+                calls.append(model)
+                # Yield so the identical requests join this call
+                await asyncio.sleep(0)
+                return {
+                    "success": False,
+                    "content": None,
+                    "finish_reason": None,
+                    "usage": None,
+                    "latency_ms": 10,
+                    "model": model,
+                    "error": "Rate limit exceeded"
+                }
+        
+        monkeypatch.setattr(service, "providers", {"openai": FailingProvider()})
+        requests = [{"messages": [{"role": "user", "content": "Hi"}]} for _ in range(3)]
+        
+        result = await service.process_batch(
+            user_id=test_user.id,
+            model_id="gpt-4o-mini",
+            requests=requests,
+            request_params={}
+        )
+        
+        assert len(calls) == 1
+        assert result["failed"] == 3
+        assert {r["error_message"] for r in result["results"]} == {"Rate limit exceeded"}
+        assert [row.status for row in db.query(Request).all()] == ["error"] * 3
@@ -0,0 +1,55 @@
+"""Tests for the chat completions route."""
+import pytest
+
+from src.services.cache_service import CacheService
+
+
+class TestChatCompletions:
+    """Test manual-mode chat completions against a stubbed provider."""
+    
+    @pytest.fixture
+    def cache_temperatures(self, monkeypatch):
+        """Record the temperature of every cache lookup and write."""
+        temperatures = {"get": [], "set": []}
+        
+        def fake_get(self, messages, model_id, temperature=0.7, max_tokens=None):
+            temperatures["get"].append(temperature)
+            return None
+        
+        def fake_set(self, messages, model_id, response, temperature=0.7, **kwargs):
+            temperatures["set"].append(temperature)
+        
+        async def fake_send_to_provider(model, messages, request_params):
+            return {
+                "success": True,
+                "content": "ok",
+                "finish_reason": "stop",
+                "usage": {"input_tokens": 5, "output_tokens": 2, "total_tokens": 7},
+                "latency_ms": 10,
+                "model": model.model_id,
+                "error": None
+            }
+        
+        monkeypatch.setattr(CacheService, "get", fake_get)
+        monkeypatch.setattr(CacheService, "set", fake_set)
+        monkeypatch.setattr("src.api.routes._send_to_provider", fake_send_to_provider)
+        return temperatures
+    
+    @pytest.mark.parametrize("temperature, cache_temperature", [(0, 0), (None, 0.7)])
+    def test_cache_temperature(
+        self, client, auth_headers, test_models, cache_temperatures, temperature, cache_temperature
+    ):
+        """Test that responses are cached under the same key batch requests use."""
+        response = client.post(
+            "/v1/chat/completions",
+            headers=auth_headers,
+            json={
+                "mode": "manual",
+                "model": "gpt-4o-mini",
+                "messages": [{"role": "user", "content": "Hi"}],
+                "temperature": temperature
+            }
+        )
+        
+        assert response.status_code == 200
+        assert cache_temperatures == {"get": [cache_temperature], "set": [cache_temperature]}
@@ -1,6 +1,6 @@
 """Tests for cost calculation service."""
 import pytest
-from src.services.cost_calculator import calculate_cost
+from src.services.cost_calculator import calculate_cost, cost_from_rates
 
 
 class TestCostCalculator:
@@ -57,4 +57,19 @@ class TestCostCalculator:
         
         # Should be rounded to 8 decimals
         assert len(str(result["input_cost_usd"]).split('.')[-1]) <= 8
-        assert len(str(result["output_cost_usd"]).split('.')[-1]) <= 8
\ No newline at end of file
+        assert len(str(result["output_cost_usd"]).split('.')[-1]) <= 8
+    
+    def test_cost_from_rates_matches_calculate_cost(self):
+        """Test that the per-token fast path agrees with calculate_cost."""
+        result = calculate_cost(
+            input_tokens=1234,
+            output_tokens=567,
+            input_price_per_1m=2.50,
+            output_price_per_1m=10.00
+        )
+        
+        assert cost_from_rates(1234, 567, 2.50 / 1_000_000, 10.00 / 1_000_000) == (
+            result["input_cost_usd"],
+            result["output_cost_usd"],
+            result["total_cost_usd"]
+        )
@@ -158,6 +158,25 @@ class TestDashboardWorkflow:
         # Should have collected all unique requests
         assert len(all_ids) == total
     
+    def test_cursor_pagination_completeness(self, client, auth_headers, test_requests):
+        """
+        Verify following next_cursor returns every record once, newest first.
+        """
+        ids = []
+        url = "/v1/analytics/requests?per_page=3"
+        while url:
+            response = client.get(url, headers=auth_headers)
+            assert response.status_code == 200
+            data = response.json()
+            
+            ids.extend(req["id"] for req in data["requests"])
+            
+            cursor = data["next_cursor"]
+            url = f"/v1/analytics/requests?per_page=3&cursor={cursor}" if cursor else None
+        
+        # Same records, same order as the fixture (newest first)
+        assert ids == [str(req.id) for req in test_requests]
+    
     def test_search_finds_all_matches(self, client, auth_headers, test_requests):
         """
         Verify search functionality finds all matching records.
@@ -207,6 +226,13 @@ class TestErrorHandling:
         )
         assert response.status_code == 422
         
+        # Malformed cursor
+        response = client.get(
+            "/v1/analytics/requests?cursor=not-a-cursor",
+            headers=auth_headers
+        )
+        assert response.status_code == 422
+        
         # Per page too large
         response = client.get(
             "/v1/analytics/requests?per_page=1000",
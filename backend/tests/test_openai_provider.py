@@ -1,38 +1,52 @@
 """Tests for OpenAI provider with mocked API calls."""
+import asyncio
 import pytest
-import responses
-from unittest.mock import patch, MagicMock
+import httpx
+import openai
+from types import SimpleNamespace
+from unittest.mock import patch, AsyncMock
 from src.providers.openai_provider import OpenAIProvider
+from src.providers.retry import RetryBudget
+
+
+def _make_response(content, model, prompt_tokens, completion_tokens):
+    """Build a plain chat completion response (no mock attribute magic)."""
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason="stop")],
+        usage=SimpleNamespace(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens
+        ),
+        model=model
+    )
 
 
 class TestOpenAIProvider:
     """Test OpenAI provider with mocked API responses."""
     
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def provider(self):
-        """Create provider instance."""
+        """Create one provider instance for the module (tests only patch it temporarily)."""
         return OpenAIProvider()
     
     @pytest.mark.asyncio
-    async def test_successful_request(self, provider):
+    async def test_successful_request(self, provider, monkeypatch):
         """Test successful API call with mocked OpenAI client."""
         # Mock the OpenAI client response
-        mock_response = MagicMock()
-        mock_response.choices = [MagicMock()]
-        mock_response.choices[0].message.content = "Hello! How can I assist you today?"
-        mock_response.choices[0].finish_reason = "stop"
-        mock_response.usage.prompt_tokens = 10
-        mock_response.usage.completion_tokens = 9
-        mock_response.usage.total_tokens = 19
-        mock_response.model = "gpt-4o-mini"
-        
-        # Patch the OpenAI client
-        with patch.object(provider.client.chat.completions, 'create', return_value=mock_response):
-            messages = [{"role": "user", "content": "Hello!"}]
-            result = await provider.send_request(
-                messages=messages,
-                model="gpt-4o-mini"
-            )
+        mock_response = _make_response("Hello! How can I assist you today?", "gpt-4o-mini", 10, 9)
+        
+        async def fake_create(**params):
+            return mock_response
+        
+        # Patch the OpenAI client (reverted by monkeypatch after the test)
+        monkeypatch.setattr(provider.client.chat.completions, "create", fake_create)
+        
+        messages = [{"role": "user", "content": "Hello!"}]
+        result = await provider.send_request(
+            messages=messages,
+            model="gpt-4o-mini"
+        )
         
         # Verify response structure
         assert result["success"] is True
@@ -45,39 +59,154 @@ class TestOpenAIProvider:
         assert result["error"] is None
     
     @pytest.mark.asyncio
-    async def test_api_error_handling(self, provider):
+    async def test_api_error_handling(self, provider, monkeypatch):
         """Test handling of API errors."""
         # Mock an exception from OpenAI
+        async def fake_create(**params):
+            raise Exception("API Error: Internal server error")
+        
+        monkeypatch.setattr(provider.client.chat.completions, "create", fake_create)
+        
+        messages = [{"role": "user", "content": "Test"}]
+        result = await provider.send_request(
+            messages=messages,
+            model="gpt-4o-mini"
+        )
+        
+        # Should return error dict, not raise exception
+        assert result["success"] is False
+        assert result["content"] is None
+        assert result["error"] is not None
+        assert "API Error" in result["error"]
+    
+    @pytest.mark.asyncio
+    async def test_retries_transient_error(self, provider):
+        """Test that rate limit errors are retried before succeeding."""
+        mock_response = _make_response("Hi!", "gpt-4o-mini", 5, 2)
+        
+        # First call is rate limited, second succeeds
+        rate_limit_response = httpx.Response(
+            429,
+            headers={"retry-after": "1"},
+            request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+        )
+        rate_limit_error = openai.RateLimitError(
+            "Rate limit exceeded", response=rate_limit_response, body=None
+        )
+        
         with patch.object(
             provider.client.chat.completions,
             'create',
-            side_effect=Exception("API Error: Internal server error")
-        ):
-            messages = [{"role": "user", "content": "Test"}]
+            new_callable=AsyncMock,
+            side_effect=[rate_limit_error, mock_response]
+        ) as mock_create, patch("asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+            messages = [{"role": "user", "content": "Hello!"}]
             result = await provider.send_request(
                 messages=messages,
                 model="gpt-4o-mini"
             )
         
-        # Should return error dict, not raise exception
+        assert result["success"] is True
+        assert result["content"] == "Hi!"
+        assert mock_create.call_count == 2
+        # Should honor the Retry-After header
+        mock_sleep.assert_awaited_once_with(1.0)
+    
+    @pytest.mark.asyncio
+    async def test_retry_budget_exhausted(self, provider, monkeypatch):
+        """Test that transient errors aren't retried once the budget is spent."""
+        monkeypatch.setattr(provider, "_retry_budget", RetryBudget(burst=0, per_second=0))
+        
+        rate_limit_response = httpx.Response(
+            429,
+            request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+        )
+        rate_limit_error = openai.RateLimitError(
+            "Rate limit exceeded", response=rate_limit_response, body=None
+        )
+        
+        with patch.object(
+            provider.client.chat.completions,
+            'create',
+            new_callable=AsyncMock,
+            side_effect=rate_limit_error
+        ) as mock_create, patch("asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+            result = await provider.send_request(
+                messages=[{"role": "user", "content": "Hello!"}],
+                model="gpt-4o-mini"
+            )
+        
         assert result["success"] is False
-        assert result["content"] is None
-        assert result["error"] is not None
-        assert "API Error" in result["error"]
+        assert mock_create.call_count == 1
+        mock_sleep.assert_not_awaited()
+    
+    @pytest.mark.asyncio
+    async def test_retry_releases_concurrency_slot(self, provider, monkeypatch):
+        """Test that a bounded call gives up its slot while waiting to retry."""
+        monkeypatch.setattr(provider, "_sem", asyncio.Semaphore(1))
+        monkeypatch.setattr(provider, "_retry_budget", RetryBudget(burst=1, per_second=0))
+        
+        rate_limit_response = httpx.Response(
+            429,
+            request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+        )
+        rate_limit_error = openai.RateLimitError(
+            "Rate limit exceeded", response=rate_limit_response, body=None
+        )
+        slot_free_while_sleeping = []
+        
+        async def fake_sleep(delay):
+            slot_free_while_sleeping.append(not provider._sem.locked())
+        
+        with patch.object(
+            provider.client.chat.completions,
+            'create',
+            new_callable=AsyncMock,
+            side_effect=[rate_limit_error, _make_response("Hi!", "gpt-4o-mini", 5, 2)]
+        ), patch("asyncio.sleep", side_effect=fake_sleep):
+            result = await provider.send_request_bounded(
+                messages=[{"role": "user", "content": "Hello!"}],
+                model="gpt-4o-mini"
+            )
+        
+        assert result["success"] is True
+        assert slot_free_while_sleeping == [True]
+        # Slot is taken back for the retry and released afterwards
+        assert not provider._sem.locked()
+    
+    @pytest.mark.asyncio
+    async def test_send_requests_preserves_order(self, provider):
+        """Test batched requests return results in input order."""
+        async def fake_send_request(messages, model, **kwargs):
+            return {"success": True, "content": messages[0]["content"], "model": model}
+        
+        batch = [
+            ([{"role": "user", "content": f"Prompt {i}"}], "gpt-4o-mini", {"temperature": 0.5})
+            for i in range(5)
+        ]
+        
+        with patch.object(provider, 'send_request', side_effect=fake_send_request):
+            results = await provider.send_requests(batch)
+        
+        assert [r["content"] for r in results] == [f"Prompt {i}" for i in range(5)]
     
     @pytest.mark.asyncio
-    async def test_missing_choices(self, provider):
+    async def test_missing_choices(self, provider, monkeypatch):
         """Test handling when API returns no choices."""
         # Mock response with no choices
-        mock_response = MagicMock()
+        mock_response = _make_response("", "gpt-4o-mini", 0, 0)
         mock_response.choices = []
         
-        with patch.object(provider.client.chat.completions, 'create', return_value=mock_response):
-            messages = [{"role": "user", "content": "Test"}]
-            result = await provider.send_request(
-                messages=messages,
-                model="gpt-4o-mini"
-            )
+        async def fake_create(**params):
+            return mock_response
+        
+        monkeypatch.setattr(provider.client.chat.completions, "create", fake_create)
+        
+        messages = [{"role": "user", "content": "Test"}]
+        result = await provider.send_request(
+            messages=messages,
+            model="gpt-4o-mini"
+        )
         
         # Should handle gracefully
         assert result["success"] is False
@@ -97,6 +226,24 @@ class TestOpenAIProvider:
         longer_tokens = provider.count_tokens(longer_text, model="gpt-4o-mini")
         assert longer_tokens > tokens
     
+    def test_count_tokens_batch_matches_serial(self, provider):
+        """Test batch counting agrees with counting one text at a time."""
+        texts = [f"Message {i}: " + "lorem ipsum " * (i * 50) for i in range(100)]
+        
+        counts = provider.count_tokens_batch(texts, model="gpt-4o-mini")
+        
+        assert counts == [provider.count_tokens(text, model="gpt-4o-mini") for text in texts]
+    
+    def test_within_token_limit(self, provider):
+        """Test budget checks agree with the full token count."""
+        text = "Hello, world! " * 100
+        tokens = provider.count_tokens(text, model="gpt-4o-mini")
+        
+        assert provider.within_token_limit(text, tokens, model="gpt-4o-mini") is True
+        assert provider.within_token_limit(text, tokens - 1, model="gpt-4o-mini") is False
+        assert provider.within_token_limit(text, 10, model="gpt-4o-mini") is False
+        assert provider.within_token_limit("", 0, model="gpt-4o-mini") is True
+    
     def test_token_counting_empty_string(self, provider):
         """Test token counting with empty string."""
         tokens = provider.count_tokens("", model="gpt-4o-mini")
@@ -49,6 +49,8 @@ export interface RequestListResponse {
   page: number;
   per_page: number;
   total_pages: number;
+  total_is_estimate: boolean;
+  next_cursor: string | null;
 }
 
 export interface RequestDetail {